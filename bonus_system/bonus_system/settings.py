@@ -5,6 +5,8 @@ Django settings for bonus_system project.
 from pathlib import Path
 import os
 
+import django
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -29,6 +31,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'employees.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,8 +46,14 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Скомпилированные шаблоны хранятся в памяти процесса; runserver сбрасывает их при изменении файлов
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -59,10 +68,59 @@ TEMPLATES = [
 WSGI_APPLICATION = 'bonus_system.wsgi.application'
 
 # Database
+# readonly — отдельное соединение только для чтения к тому же файлу: в него уходят
+# запросы страниц, помеченных read_only_view (employees/db.py). Для реплики укажите
+# ее параметры здесь или другой псевдоним в DATABASE_READ_ALIAS.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+    },
+    'readonly': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+if django.VERSION >= (5, 1):
+    # Транзакция сразу берет блокировку записи: иначе транзакция, начавшая с чтения,
+    # получает «database is locked» без ожидания busy_timeout, если кто-то успел записать
+    DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+
+DATABASE_ROUTERS = ['employees.db.ReadWriteRouter']
+DATABASE_READ_ALIAS = 'readonly'
+
+# PRAGMA для каждого нового соединения SQLite (employees/db.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',      # в режиме WAL надежно и без fsync на каждую транзакцию
+    'busy_timeout': 20000,        # мс ожидания блокировки записи
+    'cache_size': -20000,         # 20 МБ кэша страниц
+    'temp_store': 'MEMORY',
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+# Cache
+# Общий для всех процессов приложения на сервере: через него сверяются версии
+# настроек системы и списков уведомлений
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
@@ -98,6 +156,17 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic добавляет хеш содержимого к именам и сжимает файлы (gzip, brotli при наличии пакета);
+# собранную статику отдает employees.staticfiles.StaticFilesMiddleware с Cache-Control immutable
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'employees.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
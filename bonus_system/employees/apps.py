@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class EmployeesConfig(AppConfig):
+    name = 'employees'
+
+    def ready(self):
+        # Поисковый индекс, календарь событий, версия справочника и миниатюры фото
+        from . import signals  # noqa: F401
+        # PRAGMA соединений SQLite
+        from . import db  # noqa: F401
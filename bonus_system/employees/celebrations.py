@@ -0,0 +1,134 @@
+"""
+Календарь праздничных событий: дни рождения, ежегодные праздники и годовщины работы в офисе.
+
+События не зависят от пользователя, поэтому раз в сутки строится индекс
+(месяц, день) -> записи по всем сотрудникам и праздникам. Индекс хранится в кэше
+до полуночи по TIME_ZONE; запросы к базе на главной странице не нужны.
+При изменении сотрудников и праздников индекс сбрасывается (employees/signals.py).
+"""
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Employee, StaffMember, Holiday
+
+# Виды событий
+BIRTHDAY = 'birthday'              # день рождения зарегистрированного пользователя (Employee)
+STAFF_BIRTHDAY = 'staff_birthday'  # день рождения сотрудника из справочника (StaffMember)
+HOLIDAY = 'holiday'                # ежегодный праздник
+ANNIVERSARY = 'anniversary'        # годовщина работы в офисе (StaffMember.office_start_date)
+
+# Максимальный горизонт upcoming(): год вперед
+MAX_UPCOMING_DAYS = 366
+
+CalendarEvent = namedtuple('CalendarEvent', ['kind', 'date', 'title', 'person_id', 'department', 'position', 'years'])
+
+
+def _index_key(day):
+    return f'celebrations:index:{day.isoformat()}'
+
+
+def _seconds_until_midnight():
+    now = timezone.localtime()
+    midnight = timezone.make_aware(datetime.combine(now.date() + timedelta(days=1), time.min))
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def _build_index():
+    # Записи индекса: (вид, заголовок, id, отдел, должность, год отсчета)
+    index = defaultdict(list)
+
+    employees = Employee.objects.filter(birth_date__isnull=False).select_related('department')
+    for employee in employees:
+        index[employee.birth_date.month, employee.birth_date.day].append((
+            BIRTHDAY, employee.get_full_name(), employee.id,
+            employee.department.name if employee.department else None, None, None,
+        ))
+
+    staff_members = StaffMember.objects.filter(is_active=True).select_related('department', 'position')
+    for staff in staff_members:
+        department = staff.department.name if staff.department else None
+        position = staff.position.name if staff.position else None
+        if staff.birth_date:
+            index[staff.birth_date.month, staff.birth_date.day].append((
+                STAFF_BIRTHDAY, staff.get_full_name(), staff.id, department, position, None,
+            ))
+        if staff.office_start_date:
+            start = staff.office_start_date
+            index[start.month, start.day].append((
+                ANNIVERSARY, staff.get_full_name(), staff.id, department, position, start.year,
+            ))
+
+    for holiday in Holiday.objects.filter(is_annual=True):
+        index[holiday.date.month, holiday.date.day].append((
+            HOLIDAY, holiday.name, holiday.id, None, None, None,
+        ))
+
+    return dict(index)
+
+
+def calendar_index():
+    """Индекс событий (месяц, день) -> записи; строится не чаще раза в сутки"""
+    key = _index_key(timezone.localdate())
+    index = cache.get(key)
+    if index is None:
+        index = _build_index()
+        cache.set(key, index, _seconds_until_midnight())
+    return index
+
+
+def invalidate():
+    """Сбрасывает индекс текущего дня после изменения сотрудников или праздников"""
+    cache.delete(_index_key(timezone.localdate()))
+
+
+def _day_records(index, day):
+    records = list(index.get((day.month, day.day), []))
+    # 29 февраля в невисокосный год отмечается 28-го
+    if day.month == 2 and day.day == 28 and (day + timedelta(days=1)).month == 3:
+        records += index.get((2, 29), [])
+    return records
+
+
+def events_on(day, kinds=None, index=None):
+    """События дня day; kinds ограничивает виды событий"""
+    index = calendar_index() if index is None else index
+    events = []
+    for kind, title, person_id, department, position, start_year in _day_records(index, day):
+        if kinds and kind not in kinds:
+            continue
+        years = None
+        if kind == ANNIVERSARY:
+            years = day.year - start_year
+            # В день выхода на работу годовщины еще нет
+            if years <= 0:
+                continue
+        events.append(CalendarEvent(kind, day, title, person_id, department, position, years))
+    return events
+
+
+def events_between(start, end, kinds=None):
+    """События дней [start, end] по порядку дат"""
+    index = calendar_index()
+    events = []
+    day = start
+    while day <= end:
+        events += events_on(day, kinds, index)
+        day += timedelta(days=1)
+    return events
+
+
+def month_events(year, month, kinds=None):
+    """События календарного месяца"""
+    start = date(year, month, 1)
+    end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    return events_between(start, end, kinds)
+
+
+def upcoming(days=7, kinds=None):
+    """События ближайших days дней, начиная с сегодняшнего (по TIME_ZONE)"""
+    days = max(1, min(days, MAX_UPCOMING_DAYS))
+    today = timezone.localdate()
+    return events_between(today, today + timedelta(days=days - 1), kinds)
@@ -1,16 +1,23 @@
-from .models import Notification
+from django.utils.functional import SimpleLazyObject
+
+from .notifications import unread_count, dropdown_notifications, dropdown_version
 
 
 def notifications_count(request):
-    """Контекстный процессор для подсчета непрочитанных уведомлений и списка уведомлений"""
+    """
+    Контекстный процессор для подсчета непрочитанных уведомлений и списка уведомлений.
+    Значения вычисляются лениво — только если шаблон их использует: при попадании
+    в кэш фрагмента меню (ключ — notifications_version) счетчик и список не нужны.
+    """
     if request.user.is_authenticated:
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
-        notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:10]
+        user = request.user
         return {
-            'unread_notifications_count': unread_count,
-            'notifications_list': notifications
+            'unread_notifications_count': SimpleLazyObject(lambda: unread_count(user)),
+            'notifications_list': SimpleLazyObject(lambda: dropdown_notifications(user)),
+            'notifications_version': SimpleLazyObject(lambda: dropdown_version(user)),
         }
     return {
         'unread_notifications_count': 0,
-        'notifications_list': []
+        'notifications_list': [],
+        'notifications_version': '',
     }
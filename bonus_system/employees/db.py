@@ -0,0 +1,94 @@
+"""
+Настройка соединений с базой и маршрутизация чтения.
+
+SQLite: каждому новому соединению задаются PRAGMA из settings.SQLITE_PRAGMAS —
+WAL (читатели не ждут писателя и наоборот), busy_timeout (писатель ждет
+блокировку, а не получает сразу «database is locked») и кэш страниц, а также
+регистрируется функция нормализации ФИО для roster.NameFold.
+
+Страницы, которые только читают (рейтинг, отзывы, справочник, выгрузки), помечаются
+read_only_view: их запросы на чтение уходят в псевдоним settings.DATABASE_READ_ALIAS —
+отдельное соединение только для чтения к тому же файлу SQLite или реплику.
+Запись всегда идет в default; внутри транзакции default чтение тоже остается в default.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_use_read_database = ContextVar('use_read_database', default=False)
+
+# PRAGMA, которые меняют файл базы: на соединении только для чтения не выполняются
+PERSISTENT_PRAGMAS = {'journal_mode'}
+
+
+def read_alias():
+    """Псевдоним базы для чтения или None, если он не настроен"""
+    alias = getattr(settings, 'DATABASE_READ_ALIAS', None)
+    return alias if alias and alias != DEFAULT_DB_ALIAS and alias in settings.DATABASES else None
+
+
+@contextmanager
+def use_read_database():
+    """Чтение внутри блока идет в базу для чтения"""
+    token = _use_read_database.set(True)
+    try:
+        yield
+    finally:
+        _use_read_database.reset(token)
+
+
+def read_only_view(view):
+    """Декоратор view, которое не пишет в базу (или пишет только через db_for_write)"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with use_read_database():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReadWriteRouter:
+    """Чтение из read_only_view — в DATABASE_READ_ALIAS, вся запись — в default"""
+
+    def db_for_read(self, model, **hints):
+        alias = read_alias()
+        # Внутри транзакции нужно видеть собственные незафиксированные изменения
+        if alias and _use_read_database.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Объект, прочитанный из базы для чтения, сохраняется в default
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Обе базы содержат одни и те же данные
+        databases = {DEFAULT_DB_ALIAS, read_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == read_alias():
+            return False
+        return None
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    from .roster import NAME_FOLD_FUNCTION, fold_name
+
+    # Сопоставление ФИО справочника с учетными записями (roster.NameFold)
+    connection.connection.create_function(NAME_FOLD_FUNCTION, 1, fold_name, deterministic=True)
+    read_only = connection.alias == read_alias()
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            if read_only and name in PERSISTENT_PRAGMAS:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,244 @@
+"""Формирование реестра премий за месяц (Excel и PDF)"""
+import os
+import tempfile
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from django.core.files import File
+from django.utils import timezone
+
+from .db import use_read_database
+from .models import BonusTransfer, ExportJob
+from .periods import MONTH_NAMES_RU, month_period
+
+
+EXPORT_FORMATS = {
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'pdf': ('pdf', 'application/pdf'),
+}
+
+
+def registry_transfers(year, month):
+    """Переводы, попадающие в реестр за месяц"""
+    return BonusTransfer.objects.filter(
+        is_deleted=False,
+        **month_period(year, month).filter_kwargs()
+    ).select_related('to_employee', 'to_employee__department', 'to_employee__position').order_by('to_employee__last_name')
+
+
+def registry_filename(year, month, export_format):
+    """Имя файла реестра для скачивания"""
+    extension, content_type = EXPORT_FORMATS[export_format]
+    return f'реестр_премий_{MONTH_NAMES_RU[month]}_{year}.{extension}'
+
+
+def write_transfers_excel(output, transfers, year, month):
+    """
+    Реестр в Excel.
+    Книга в режиме write_only пишет строки во временный файл по мере обхода
+    переводов, поэтому память не растет с числом переводов за месяц.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=f"Реестр {MONTH_NAMES_RU[month]} {year}")
+    
+    # Настройка ширины колонок (в режиме write_only — до записи строк)
+    ws.column_dimensions['A'].width = 30
+    ws.column_dimensions['B'].width = 25
+    ws.column_dimensions['C'].width = 25
+    ws.column_dimensions['D'].width = 15
+    
+    def styled(value, bold=False, size=None, center=False):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = Font(bold=bold, size=size)
+        if center:
+            cell.alignment = Alignment(horizontal='center')
+        return cell
+    
+    # Шапка
+    ws.merged_cells.add('A1:D1')
+    ws.append([styled(f'Начисление из горизонтального премирования за "{MONTH_NAMES_RU[month].upper()}" {year}', bold=True, size=14, center=True)])
+    ws.append([])
+    
+    # Заголовки таблицы
+    headers = ['ФИО', 'Отдел', 'Должность', 'Сумма']
+    ws.append([styled(header, bold=True, center=True) for header in headers])
+    
+    # Данные
+    total_amount = 0
+    for transfer in transfers.iterator(chunk_size=500):
+        employee = transfer.to_employee
+        ws.append([
+            employee.get_full_name(),
+            employee.department.name if employee.department else '',
+            employee.position.name if employee.position else '',
+            float(transfer.amount),
+        ])
+        total_amount += float(transfer.amount)
+    
+    # Итого
+    ws.append([None, None, styled('', bold=True), styled(total_amount, bold=True)])
+    
+    # Подпись генерального директора
+    ws.append([])
+    ws.append([styled('Генеральный директор', bold=True)])
+    ws.append([])
+    ws.append([])
+    ws.append(['_________________'])
+    
+    wb.save(output)
+
+
+def write_transfers_pdf(output, transfers, year, month):
+    """Реестр в PDF с поддержкой кириллицы"""
+    # Пробуем зарегистрировать шрифт с поддержкой кириллицы
+    # Используем системные шрифты Windows или стандартные Unicode-шрифты
+    font_name = 'Helvetica'  # По умолчанию
+    
+    # Пробуем найти и зарегистрировать шрифт с поддержкой кириллицы
+    try:
+        import platform
+        system = platform.system()
+        
+        if system == 'Windows':
+            # Пробуем использовать стандартные шрифты Windows
+            font_paths = [
+                'C:/Windows/Fonts/arial.ttf',
+                'C:/Windows/Fonts/arialbd.ttf',
+                'C:/Windows/Fonts/times.ttf',
+            ]
+        elif system == 'Linux':
+            font_paths = [
+                '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+                '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
+            ]
+        else:
+            font_paths = []
+        
+        for font_path in font_paths:
+            if os.path.exists(font_path):
+                try:
+                    pdfmetrics.registerFont(TTFont('CyrillicFont', font_path, 'UTF-8'))
+                    font_name = 'CyrillicFont'
+                    break
+                except:
+                    continue
+    except Exception as e:
+        # Если не удалось зарегистрировать шрифт, используем стандартный
+        pass
+    
+    doc = SimpleDocTemplate(output, pagesize=A4, rightMargin=20*mm, leftMargin=20*mm, topMargin=20*mm, bottomMargin=20*mm)
+    story = []
+    
+    styles = getSampleStyleSheet()
+    
+    # Создаем стили с правильным шрифтом
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Normal'],
+        fontSize=14,
+        textColor=colors.HexColor('#000000'),
+        spaceAfter=30,
+        alignment=1,  # Center
+        fontName=font_name,
+        encoding='utf-8',
+    )
+    
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=styles['Normal'],
+        fontName=font_name,
+        fontSize=12,
+        encoding='utf-8',
+    )
+    
+    # Заголовок
+    title_text = f'Начисление из горизонтального премирования за "{MONTH_NAMES_RU[month].upper()}" {year}'
+    story.append(Paragraph(title_text, title_style))
+    story.append(Spacer(1, 12))
+    
+    # Подготовка данных для таблицы
+    data = [['ФИО', 'Отдел', 'Должность', 'Сумма']]
+    total_amount = 0
+    
+    for transfer in transfers:
+        employee = transfer.to_employee
+        full_name = employee.get_full_name()
+        dept_name = employee.department.name if employee.department else ''
+        pos_name = employee.position.name if employee.position else ''
+        
+        data.append([
+            full_name,
+            dept_name,
+            pos_name,
+            f'{float(transfer.amount):.2f}'
+        ])
+        total_amount += float(transfer.amount)
+    
+    # Итого
+    data.append(['', '', '', f'{total_amount:.2f}'])
+    
+    # Создание таблицы
+    table = Table(data, colWidths=[60*mm, 60*mm, 60*mm, 25*mm])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ffffff')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#000000')),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), font_name),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, -1), (-1, -1), font_name),
+        ('FONTSIZE', (0, -1), (-1, -1), 12),
+        ('FONTNAME', (0, 1), (-1, -2), font_name),
+        ('FONTSIZE', (0, 1), (-1, -2), 10),
+    ]))
+    
+    story.append(table)
+    story.append(Spacer(1, 20))
+
+    # Подпись
+    story.append(Paragraph('Генеральный директор', normal_style))
+    story.append(Spacer(1, 30))
+    story.append(Paragraph('_________________/_____________________', normal_style))
+    
+    doc.build(story)
+
+
+def build_export_job(job):
+    """
+    Формирует файл реестра для задания и сохраняет его в MEDIA_ROOT/exports/.
+    После успешной сборки удаляет файлы устаревших версий того же реестра.
+    """
+    year, month = job.month.year, job.month.month
+    transfers = registry_transfers(year, month)
+    writer = write_transfers_pdf if job.format == 'pdf' else write_transfers_excel
+    extension, content_type = EXPORT_FORMATS[job.format]
+    
+    with tempfile.TemporaryFile() as output, use_read_database():
+        writer(output, transfers, year, month)
+        output.seek(0)
+        job.file.save(f'registry_{year}_{month:02d}_v{job.data_version}.{extension}', File(output), save=False)
+    job.status = 'done'
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save()
+    
+    stale_jobs = ExportJob.objects.filter(
+        month=job.month,
+        format=job.format,
+        data_version__lt=job.data_version
+    )
+    for stale_job in stale_jobs:
+        if stale_job.file:
+            stale_job.file.delete(save=False)
+    stale_jobs.delete()
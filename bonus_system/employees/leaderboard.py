@@ -0,0 +1,145 @@
+"""
+Рейтинг сотрудников по полученным переводам за период с кэшированием.
+
+Ключ кэша включает период и версию его данных: сумму версий реестра
+(RegistryMonthVersion) за месяцы периода, которые растут при каждом переводе
+и отмене перевода, и версию справочника (ФИО, отдел, участие в премировании).
+Любое изменение дает новый ключ, поэтому закрытые периоды хранятся без срока,
+а текущий — недолго, чтобы в кэше не копились его устаревшие версии.
+"""
+import uuid
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import Employee, Department, MonthlyBonusSummary, RegistryMonthVersion
+from .roster import roster_version
+
+CURRENT_PERIOD_TIMEOUT = 60 * 10
+GENERATION_KEY = 'leaderboard:generation'
+
+LeaderboardRow = namedtuple('LeaderboardRow', ['employee_id', 'full_name', 'department', 'total_received'])
+RankedRow = namedtuple('RankedRow', ['rank', 'position', 'employee_id', 'full_name', 'department', 'total_received'])
+
+# Итоги за период, место с учетом равных сумм (RANK) и порядковый номер (ROW_NUMBER);
+# возвращаются только первые top строк и строки рядом с позицией пользователя
+RANK_WINDOW_SQL = """
+WITH ranked AS (
+    SELECT
+        summary.employee_id AS employee_id,
+        SUM(summary.total_amount) AS total,
+        RANK() OVER (ORDER BY SUM(summary.total_amount) DESC) AS leader_rank,
+        ROW_NUMBER() OVER (ORDER BY SUM(summary.total_amount) DESC, summary.employee_id) AS leader_position
+    FROM {summary_table} summary
+    JOIN {employee_table} employee ON employee.id = summary.employee_id
+    WHERE employee.participates_in_bonus = %s
+        AND summary.month >= %s AND summary.month <= %s
+        AND summary.transfers_count > 0
+    GROUP BY summary.employee_id
+),
+me AS (
+    SELECT leader_position FROM ranked WHERE employee_id = %s
+)
+SELECT
+    ranked.leader_rank, ranked.leader_position, ranked.total, (SELECT COUNT(*) FROM ranked) AS participants,
+    employee.id, employee.last_name, employee.first_name, employee.middle_name,
+    department.name AS department_name
+FROM ranked
+JOIN {employee_table} employee ON employee.id = ranked.employee_id
+LEFT JOIN {department_table} department ON department.id = employee.department_id
+WHERE ranked.leader_position <= %s
+    OR ranked.leader_position BETWEEN (SELECT leader_position FROM me) - %s AND (SELECT leader_position FROM me) + %s
+ORDER BY ranked.leader_position
+"""
+
+
+def rating_queryset(period):
+    """Рейтинг участников по помесячным итогам MonthlyBonusSummary за месяцы периода"""
+    return Employee.objects.filter(participates_in_bonus=True).annotate(
+        total_received=Sum(
+            'monthly_summaries__total_amount',
+            filter=Q(monthly_summaries__month__gte=period.first_month,
+                    monthly_summaries__month__lte=period.last_month,
+                    monthly_summaries__transfers_count__gt=0)
+        )
+    ).filter(total_received__isnull=False).order_by('-total_received')
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(GENERATION_KEY, generation, None):
+            generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate_all():
+    """Сбрасывает рейтинги всех периодов (после пересчета итогов в обход переводов)"""
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def data_version(period):
+    """Версия данных рейтинга за период"""
+    months_version = RegistryMonthVersion.objects.filter(
+        month__gte=period.first_month,
+        month__lte=period.last_month,
+    ).aggregate(total=Sum('version'))['total'] or 0
+    return f'{months_version}:{roster_version()}:{_generation()}'
+
+
+def leaderboard(period):
+    """Строки рейтинга за период (LeaderboardRow) от большей суммы к меньшей"""
+    key = f'leaderboard:{period.type}:{period.value}:{data_version(period)}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = [
+            LeaderboardRow(
+                employee.id,
+                employee.get_full_name(),
+                employee.department.name if employee.department else None,
+                employee.total_received,
+            )
+            for employee in rating_queryset(period).select_related('department')
+        ]
+        # Период, который еще не закончился, может получить новые переводы
+        is_closed = period.end <= timezone.now()
+        cache.set(key, rows, None if is_closed else CURRENT_PERIOD_TIMEOUT)
+    return rows
+
+
+def rank_window(period, employee, top=10, neighbours=2):
+    """
+    Окно рейтинга за период одним запросом с оконными функциями: первые top мест,
+    место и сумма сотрудника employee и по neighbours соседей выше и ниже него.
+    Возвращает словарь top, me (или None, если у сотрудника нет переводов за период),
+    around и participants.
+    """
+    sql = RANK_WINDOW_SQL.format(
+        summary_table=MonthlyBonusSummary._meta.db_table,
+        employee_table=Employee._meta.db_table,
+        department_table=Department._meta.db_table,
+    )
+    params = [True, period.first_month, period.last_month, employee.id, top, neighbours, neighbours]
+
+    rows = []
+    participants = 0
+    for row in Employee.objects.raw(sql, params):
+        participants = row.participants
+        rows.append(RankedRow(
+            row.leader_rank, row.leader_position, row.id, row.get_full_name(), row.department_name,
+            MonthlyBonusSummary._meta.get_field('total_amount').to_python(row.total),
+        ))
+
+    me = next((row for row in rows if row.employee_id == employee.id), None)
+    around = []
+    if me is not None:
+        around = [row for row in rows if abs(row.position - me.position) <= neighbours]
+    return {
+        'top': [row for row in rows if row.position <= top],
+        'me': me,
+        'around': around,
+        'participants': participants,
+    }
@@ -0,0 +1,166 @@
+"""
+Живые обновления открытых вкладок через Server-Sent Events.
+
+Код переводов и новостей публикует события во внутрипроцессную шину после
+фиксации транзакции. Поток SSE пользователя (notifications_stream_view, только
+под ASGI) подписан на его личные и общие события: пересылает новые уведомления
+и после каждой пачки событий отправляет состояние — число непрочитанных
+уведомлений и месячный баланс — если оно изменилось.
+
+Шина живет в памяти процесса: потоки SSE и запись должны обслуживаться одним
+процессом ASGI-сервера. В процессе без подписчиков публикация ничего не стоит,
+а вкладка получит изменения при следующей загрузке страницы.
+"""
+import asyncio
+import json
+import threading
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.utils import formats, timezone
+
+LiveEvent = namedtuple('LiveEvent', ['name', 'data', 'exclude_user_id'])
+
+NOTIFICATION = 'notification'
+STATE = 'state'
+
+QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 25
+# Браузер переподключается сам; ограничение срока не дает копиться зависшим соединениям
+STREAM_MAX_SECONDS = 60 * 30
+RETRY_MILLISECONDS = 5000
+
+
+class Subscription:
+    """Очередь событий одного потока SSE в его цикле событий"""
+
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def deliver(self, event):
+        if event.exclude_user_id == self.user_id:
+            return
+        if self.queue.full():
+            # Клиент не успевает читать: старое событие теряется, состояние все равно будет пересчитано
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class Hub:
+    """Подписчики по id пользователя; публикация потокобезопасна"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, event, user_id=None):
+        """Событие подписчикам пользователя user_id (None — всем)"""
+        with self._lock:
+            if user_id is None:
+                targets = [subscription for subscriptions in self._subscriptions.values() for subscription in subscriptions]
+            else:
+                targets = list(self._subscriptions.get(user_id, ()))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Цикл событий уже закрыт: подписка снимется при завершении потока
+                pass
+
+
+hub = Hub()
+
+
+def notification_data(notification):
+    return {
+        'id': notification.id,
+        'type': notification.type,
+        'title': notification.title,
+        'message': notification.message,
+        'created_at': formats.date_format(timezone.localtime(notification.created_at), 'd.m.Y H:i'),
+    }
+
+
+def publish_notification(notification):
+    """Новое личное уведомление (после фиксации транзакции)"""
+    event = LiveEvent(NOTIFICATION, notification_data(notification), None)
+    transaction.on_commit(lambda: hub.publish(event, notification.user_id))
+
+
+def publish_broadcast(notification):
+    """Новое общее уведомление всем, кроме автора (после фиксации транзакции)"""
+    event = LiveEvent(NOTIFICATION, notification_data(notification), notification.author_id)
+    transaction.on_commit(lambda: hub.publish(event))
+
+
+def publish_state(user_id):
+    """Изменились баланс или счетчик непрочитанных пользователя (после фиксации транзакции)"""
+    event = LiveEvent(STATE, None, None)
+    transaction.on_commit(lambda: hub.publish(event, user_id))
+
+
+def user_state(user_id):
+    """Число непрочитанных уведомлений и месячный баланс пользователя"""
+    from .models import Employee
+    from .notifications import unread_count
+
+    user = Employee.objects.get(pk=user_id)
+    return {
+        'unread_count': unread_count(user),
+        # Тот же формат, что и в шаблонах
+        'monthly_bonus_balance': formats.localize(user.monthly_bonus_balance),
+    }
+
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+async def event_stream(user_id):
+    """Поток SSE пользователя: начальное состояние, затем уведомления и изменения состояния"""
+    # Подписка раньше чтения состояния: событие между ними не потеряется
+    subscription = hub.subscribe(user_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_SECONDS
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        state = await sync_to_async(user_state)(user_id)
+        yield format_event(STATE, state)
+
+        while loop.time() < deadline:
+            try:
+                events = [await asyncio.wait_for(subscription.queue.get(), KEEPALIVE_SECONDS)]
+            except asyncio.TimeoutError:
+                # Комментарий SSE держит соединение открытым через прокси
+                yield ': keepalive\n\n'
+                continue
+            while not subscription.queue.empty():
+                events.append(subscription.queue.get_nowait())
+
+            for event in events:
+                if event.name == NOTIFICATION:
+                    yield format_event(NOTIFICATION, event.data)
+            # Состояние пересчитывается один раз на пачку событий
+            new_state = await sync_to_async(user_state)(user_id)
+            if new_state != state:
+                state = new_state
+                yield format_event(STATE, state)
+    finally:
+        hub.unsubscribe(subscription)
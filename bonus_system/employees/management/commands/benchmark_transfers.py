@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, OperationalError
+from django.db.models import Sum
+
+from employees.models import Employee, BonusTransfer
+from employees.transfers import transfer_bonus, TransferError
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочная проверка проведения переводов: параллельные переводы от общих отправителей. '
+        'Создает временных сотрудников bench_*, проверяет отсутствие потерянных обновлений и удаляет их.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Число параллельных потоков')
+        parser.add_argument('--transfers', type=int, default=50, help='Переводов на поток')
+        parser.add_argument('--senders', type=int, default=2, help='Число отправителей (потоки делят их балансы)')
+        parser.add_argument('--receivers', type=int, default=5, help='Число получателей')
+        parser.add_argument('--amount', type=Decimal, default=Decimal('10.00'), help='Сумма одного перевода')
+        parser.add_argument('--keep', action='store_true', help='Не удалять созданных сотрудников')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        per_worker = options['transfers']
+        amount = options['amount']
+        attempts = workers * per_worker
+
+        # Баланса отправителей хватает примерно на 80% попыток — часть переводов должна быть отклонена
+        initial_balance = (amount * attempts * 8 // 10) // options['senders']
+        senders = [self._employee(f's{i}', initial_balance) for i in range(options['senders'])]
+        receivers = [self._employee(f'r{i}', 0) for i in range(options['receivers'])]
+
+        def run(worker):
+            stats = {'ok': 0, 'rejected': 0, 'locked': 0, 'latencies': []}
+            try:
+                for i in range(per_worker):
+                    sender = Employee.objects.get(pk=senders[(worker + i) % len(senders)].pk)
+                    receiver = receivers[(worker * per_worker + i) % len(receivers)]
+                    transfer = BonusTransfer(amount=amount, reason='other', explanation='benchmark', review='benchmark')
+                    started = time.perf_counter()
+                    try:
+                        transfer_bonus(transfer, sender, receiver)
+                        stats['ok'] += 1
+                    except TransferError:
+                        stats['rejected'] += 1
+                    except OperationalError:
+                        stats['locked'] += 1
+                    stats['latencies'].append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            return stats
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run, range(workers)))
+        elapsed = time.perf_counter() - started
+
+        ok = sum(r['ok'] for r in results)
+        rejected = sum(r['rejected'] for r in results)
+        locked = sum(r['locked'] for r in results)
+        latencies = sorted(l for r in results for l in r['latencies'])
+
+        # Проверка инвариантов: деньги не появились и не пропали
+        sender_ids = [e.pk for e in senders]
+        receiver_ids = [e.pk for e in receivers]
+        sent_total = BonusTransfer.objects.filter(from_employee_id__in=sender_ids).aggregate(total=Sum('amount'))['total'] or 0
+        balances_total = Employee.objects.filter(pk__in=sender_ids).aggregate(total=Sum('monthly_bonus_balance'))['total']
+        received_total = Employee.objects.filter(pk__in=receiver_ids).aggregate(total=Sum('received_bonus_balance'))['total']
+        negative = Employee.objects.filter(pk__in=sender_ids, monthly_bonus_balance__lt=0).count()
+        lost_debits = initial_balance * len(senders) - sent_total - balances_total
+        lost_credits = sent_total - received_total
+
+        self.stdout.write(f'Попыток: {attempts}, проведено: {ok}, отклонено (нет средств): {rejected}, database is locked: {locked}')
+        self.stdout.write(f'Время: {elapsed:.2f} с, пропускная способность: {ok / elapsed:.1f} переводов/с')
+        if latencies:
+            p50 = latencies[len(latencies) // 2]
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(f'Задержка перевода: p50 {p50 * 1000:.1f} мс, p95 {p95 * 1000:.1f} мс')
+        self.stdout.write(f'Потерянных списаний: {lost_debits}, потерянных зачислений: {lost_credits}, отрицательных балансов: {negative}')
+
+        if lost_debits or lost_credits or negative or ok != BonusTransfer.objects.filter(from_employee_id__in=sender_ids).count():
+            self.stdout.write(self.style.ERROR('Обнаружены потерянные обновления'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Потерянных обновлений нет'))
+
+        if not options['keep']:
+            Employee.objects.filter(pk__in=sender_ids + receiver_ids).delete()
+
+    def _employee(self, suffix, balance):
+        username = f'bench_{suffix}_{time.time_ns()}'
+        return Employee.objects.create(
+            username=username,
+            email=f'{username}@bench.local',
+            phone=f'+7{time.time_ns() % 10**10:010d}',
+            first_name='Bench',
+            last_name=suffix,
+            monthly_bonus_balance=balance,
+            is_active=False,
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from employees.models import Employee, StaffMember
+from employees.thumbnails import build_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие миниатюры фотографий сотрудников (для уже загруженных фото)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Перестроить и существующие миниатюры')
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in (Employee, StaffMember):
+            names.update(model.objects.exclude(photo='').exclude(photo__isnull=True).values_list('photo', flat=True))
+
+        created = failed = 0
+        for name in sorted(names):
+            try:
+                created += build_thumbnails(name, force=options['force'])
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'{name}: {e}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Фото: {len(names)}, создано миниатюр: {created}, ошибок: {failed}'))
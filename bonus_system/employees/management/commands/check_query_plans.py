@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from employees.models import Employee, BonusTransfer, Notification, StaffMember
+from employees.pagination import before
+
+
+class Command(BaseCommand):
+    help = 'Проверяет через EXPLAIN (QUERY PLAN), что горячие запросы используют свои индексы'
+
+    def hot_queries(self):
+        """(описание, queryset, допустимые индексы)"""
+        end = timezone.now()
+        start = end - timedelta(days=31)
+        return [
+            (
+                'Полученные переводы сотрудника за период',
+                BonusTransfer.objects.filter(to_employee_id=1, is_deleted=False, created_at__gte=start, created_at__lt=end),
+                ['transfer_to_active_created'],
+            ),
+            (
+                'Лента неудаленных переводов',
+                BonusTransfer.objects.filter(is_deleted=False).order_by('-created_at')[:20],
+                ['transfer_active_created'],
+            ),
+            (
+                'Следующая страница ленты переводов',
+                BonusTransfer.objects.filter(before(end, 1000), is_deleted=False).order_by('-created_at', '-id')[:21],
+                ['transfer_active_created'],
+            ),
+            (
+                'Реестр переводов за месяц',
+                BonusTransfer.objects.filter(is_deleted=False, created_at__gte=start, created_at__lt=end),
+                ['transfer_active_created'],
+            ),
+            (
+                'Непрочитанные уведомления пользователя',
+                Notification.objects.filter(user_id=1, is_read=False).order_by('-created_at')[:10],
+                ['notification_user_unread_idx'],
+            ),
+            (
+                'Лента уведомлений пользователя',
+                Notification.objects.filter(user_id=1).order_by('-created_at')[:20],
+                ['notification_user_created_idx'],
+            ),
+            (
+                'Следующая страница уведомлений пользователя',
+                Notification.objects.filter(before(end, 1000), user_id=1).order_by('-created_at', '-id')[:21],
+                ['notification_user_created_idx'],
+            ),
+            (
+                'Поиск учетной записи по ФИО',
+                Employee.objects.filter(last_name='Иванов', first_name='Иван', middle_name='Иванович'),
+                ['employee_fio_idx'],
+            ),
+            (
+                'Поиск в справочнике по ФИО',
+                StaffMember.objects.filter(last_name='Иванов', first_name='Иван', middle_name='Иванович'),
+                ['staffmember_fio_idx'],
+            ),
+        ]
+
+    def handle(self, *args, **options):
+        failed = []
+        for title, queryset, indexes in self.hot_queries():
+            plan = queryset.explain()
+            used = [name for name in indexes if name in plan]
+            if used:
+                self.stdout.write(self.style.SUCCESS(f'OK   {title}: {used[0]}'))
+            else:
+                failed.append(title)
+                self.stdout.write(self.style.ERROR(f'FAIL {title}: ожидался один из индексов {", ".join(indexes)}'))
+                self.stdout.write(f'     {plan}')
+
+        if failed:
+            raise CommandError(f'Запросы без индекса: {len(failed)}')
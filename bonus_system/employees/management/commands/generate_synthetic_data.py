@@ -0,0 +1,334 @@
+import random
+from itertools import accumulate
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from employees import celebrations, leaderboard
+from employees.models import (
+    Employee, Department, Position, StaffMember, BonusTransfer, Notification,
+    MonthlyBonusSummary, RegistryMonthVersion,
+)
+from employees.roster import bump_roster_version
+from employees.search import search_available, rebuild_index
+
+# Признаки синтетических данных: по ним --clear удаляет прошлый набор
+SYNTHETIC_DOMAIN = 'synthetic.local'
+DEPARTMENT_PREFIX = 'Синтетический отдел'
+
+BATCH_SIZE = 2000
+
+LAST_NAMES = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов', 'Новиков', 'Федоров',
+    'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров', 'Павлов', 'Козлов', 'Степанов', 'Николаев',
+]
+MALE_NAMES = ['Александр', 'Дмитрий', 'Максим', 'Сергей', 'Андрей', 'Алексей', 'Артем', 'Илья', 'Кирилл', 'Михаил']
+FEMALE_NAMES = ['Анна', 'Мария', 'Елена', 'Ольга', 'Наталья', 'Екатерина', 'Татьяна', 'Ирина', 'Светлана', 'Юлия']
+PATRONYMICS = ['Александров', 'Дмитриев', 'Сергеев', 'Андреев', 'Алексеев', 'Михайлов', 'Иванов', 'Петров']
+POSITION_NAMES = ['Стажер', 'Специалист', 'Старший специалист', 'Ведущий специалист', 'Эксперт', 'Руководитель группы', 'Начальник отдела', 'Аналитик']
+REVIEWS = [
+    'Спасибо за помощь с отчетом!', 'Выручил в сложной ситуации с клиентом.', 'Отличная презентация для руководства.',
+    'Быстро разобрался с проблемой на сервере.', 'Помогла подготовить документы к проверке.', 'За наставничество новых сотрудников.',
+    'Спасибо за терпение и поддержку в проекте.', 'Закрыли квартал благодаря тебе.',
+]
+AMOUNTS = [Decimal(value) for value in (50, 100, 150, 200, 250, 300, 500)]
+AMOUNT_WEIGHTS = [10, 30, 15, 20, 8, 10, 7]
+
+
+@contextmanager
+def explicit_created_at(*models):
+    """Позволяет задать created_at при bulk_create (auto_now_add перезаписал бы его)"""
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def month_starts(months):
+    """Первые числа последних months месяцев, включая текущий (по TIME_ZONE)"""
+    current = timezone.localdate().replace(day=1)
+    starts = [current]
+    for _ in range(months - 1):
+        starts.append((starts[-1] - timedelta(days=1)).replace(day=1))
+    return list(reversed(starts))
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетический набор данных для нагрузочных замеров: отделы, должности, справочник '
+        'сотрудников, учетные записи, переводы и уведомления с реалистичными распределениями. '
+        f'Учетные записи и сотрудники получают email в домене {SYNTHETIC_DOMAIN}. '
+        'Запускайте на копии базы: команда пишет в базу из settings.DATABASES.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--staff', type=int, default=1000, help='Число сотрудников в справочнике (1000, 10000, 100000)')
+        parser.add_argument('--accounts-share', type=float, default=0.7, help='Доля сотрудников с учетной записью')
+        parser.add_argument('--months', type=int, default=6, help='За сколько месяцев создавать переводы')
+        parser.add_argument('--transfers-per-month', type=float, default=2.0, help='Среднее число переводов одного пользователя в месяц')
+        parser.add_argument('--password', default='synthetic', help='Пароль всех синтетических учетных записей')
+        parser.add_argument('--seed', type=int, default=1, help='Зерно генератора случайных чисел')
+        parser.add_argument('--clear', action='store_true', help='Удалить прошлый синтетический набор перед генерацией')
+        parser.add_argument('--clear-only', action='store_true', help='Только удалить синтетический набор')
+
+    def handle(self, *args, **options):
+        if options['clear'] or options['clear_only']:
+            started = time.perf_counter()
+            removed = clear_synthetic_data()
+            self.stdout.write(f'Удалено синтетических учетных записей: {removed} ({time.perf_counter() - started:.1f} с)')
+            if options['clear_only']:
+                return
+        elif Employee.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}').exists():
+            raise CommandError('Синтетический набор уже есть в базе: используйте --clear')
+
+        if options['staff'] < 10:
+            raise CommandError('Нужно не меньше 10 сотрудников')
+
+        started = time.perf_counter()
+        generator = SyntheticDataGenerator(
+            staff=options['staff'],
+            accounts_share=options['accounts_share'],
+            months=options['months'],
+            transfers_per_month=options['transfers_per_month'],
+            password=options['password'],
+            seed=options['seed'],
+        )
+        counts = generator.run(self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            'Сгенерировано: ' + ', '.join(f'{name} {count}' for name, count in counts.items())
+            + f' за {time.perf_counter() - started:.1f} с'
+        ))
+
+
+def clear_synthetic_data():
+    """Удаляет синтетический набор; возвращает число удаленных учетных записей"""
+    employees = Employee.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}')
+    with transaction.atomic():
+        transfers = BonusTransfer.objects.filter(Q(from_employee__in=employees) | Q(to_employee__in=employees))
+        months = set(transfers.dates('created_at', 'month'))
+        transfers.delete()
+        Notification.objects.filter(user__in=employees).delete()
+        MonthlyBonusSummary.objects.filter(employee__in=employees).delete()
+        StaffMember.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}').delete()
+        _, removed = employees.delete()
+        Department.objects.filter(name__startswith=DEPARTMENT_PREFIX).delete()
+        for month in months:
+            RegistryMonthVersion.bump(timezone.make_aware(datetime.combine(month, datetime.min.time())))
+    leaderboard.invalidate_all()
+    return removed.get(Employee._meta.label, 0)
+
+
+class SyntheticDataGenerator:
+    """
+    Распределения:
+    - размеры отделов и популярность получателей — распределение Парето
+      (несколько больших отделов и «звезд», длинный хвост);
+    - 60% переводов — коллегам из своего отдела;
+    - почти половина переводов — в последние три дня месяца, когда тратят остаток баланса;
+    - уведомления старше недели прочитаны.
+    """
+
+    def __init__(self, staff, accounts_share, months, transfers_per_month, password, seed):
+        self.staff_count = staff
+        self.accounts_share = accounts_share
+        self.months = months
+        self.transfers_per_month = transfers_per_month
+        self.password = make_password(password)
+        self.rnd = random.Random(seed)
+        self.now = timezone.now()
+
+    def run(self, log):
+        with transaction.atomic():
+            departments, positions = self.create_departments()
+            log(f'Отделов: {len(departments)}, должностей: {len(positions)}')
+            accounts = self.create_staff(departments, positions)
+            log(f'Сотрудников: {self.staff_count}, учетных записей: {len(accounts)}')
+            transfers, notifications = self.create_transfers(accounts)
+            log(f'Переводов: {transfers}, уведомлений: {notifications}')
+
+            MonthlyBonusSummary.rebuild()
+            for month in month_starts(self.months):
+                RegistryMonthVersion.bump(timezone.make_aware(datetime.combine(month, datetime.min.time())))
+            if search_available():
+                rebuild_index(StaffMember.objects.only('last_name', 'first_name', 'middle_name', 'email', 'phone').iterator())
+
+        # Массовая вставка идет в обход сигналов — сбрасываем кэши вручную
+        leaderboard.invalidate_all()
+        bump_roster_version()
+        celebrations.invalidate()
+        return {
+            'отделов': len(departments),
+            'сотрудников': self.staff_count,
+            'учетных записей': len(accounts),
+            'переводов': transfers,
+            'уведомлений': notifications,
+        }
+
+    def pareto_weights(self, count, alpha):
+        # Накопленные веса: choices(cum_weights=...) не пересчитывает их на каждый выбор
+        return list(accumulate(self.rnd.paretovariate(alpha) for _ in range(count)))
+
+    def create_departments(self):
+        count = max(3, int(self.staff_count ** 0.5))
+        departments = Department.objects.bulk_create(
+            [Department(name=f'{DEPARTMENT_PREFIX} {number}') for number in range(1, count + 1)],
+            batch_size=BATCH_SIZE,
+        )
+        positions = []
+        for department in departments:
+            for name in self.rnd.sample(POSITION_NAMES, self.rnd.randint(3, len(POSITION_NAMES))):
+                positions.append(Position(name=name, department=department))
+        positions = Position.objects.bulk_create(positions, batch_size=BATCH_SIZE)
+        return departments, positions
+
+    def person(self):
+        gender = self.rnd.choice('MF')
+        last_name = self.rnd.choice(LAST_NAMES)
+        patronymic = self.rnd.choice(PATRONYMICS)
+        if gender == 'M':
+            return gender, last_name, self.rnd.choice(MALE_NAMES), patronymic + 'ич'
+        return gender, last_name + 'а', self.rnd.choice(FEMALE_NAMES), patronymic + 'на'
+
+    def create_staff(self, departments, positions):
+        positions_by_department = {}
+        for position in positions:
+            positions_by_department.setdefault(position.department_id, []).append(position)
+        department_weights = self.pareto_weights(len(departments), 1.5)
+        today = timezone.localdate()
+
+        accounts = []
+        staff_members = []
+        for number in range(self.staff_count):
+            department = self.rnd.choices(departments, cum_weights=department_weights)[0]
+            position = self.rnd.choice(positions_by_department[department.id])
+            gender, last_name, first_name, middle_name = self.person()
+            birth_date = date(self.rnd.randint(1960, 2003), self.rnd.randint(1, 12), self.rnd.randint(1, 28))
+            # Стаж: больше недавно пришедших, хвост до 15 лет
+            office_start_date = today - timedelta(days=min(int(self.rnd.expovariate(1 / 900)), 15 * 365))
+            is_active = self.rnd.random() > 0.08
+
+            account = None
+            if is_active and self.rnd.random() < self.accounts_share:
+                email = f'synth{number}@{SYNTHETIC_DOMAIN}'
+                # Как при регистрации: username совпадает с email (USERNAME_FIELD)
+                account = Employee(
+                    username=email,
+                    email=email,
+                    phone=f'+7999{number:07d}',
+                    password=self.password,
+                    last_name=last_name, first_name=first_name, middle_name=middle_name,
+                    gender=gender, birth_date=birth_date, office_start_date=office_start_date,
+                    department=department, position=position,
+                    participates_in_bonus=self.rnd.random() > 0.05,
+                    data_processing_consent=True,
+                    is_admin=not accounts,
+                )
+                accounts.append(account)
+            staff_members.append(StaffMember(
+                last_name=last_name, first_name=first_name, middle_name=middle_name,
+                email=f'staff{number}@{SYNTHETIC_DOMAIN}',
+                phone=f'+7998{number:07d}',
+                gender=gender, birth_date=birth_date, office_start_date=office_start_date,
+                department=department, position=position,
+                is_active=is_active,
+                employee_profile=account,
+            ))
+
+        # Сначала учетные записи: bulk_create сотрудников берет id связанного профиля из объекта
+        Employee.objects.bulk_create(accounts, batch_size=BATCH_SIZE)
+        StaffMember.objects.bulk_create(staff_members, batch_size=BATCH_SIZE)
+        return accounts
+
+    def transfer_moment(self, month_start):
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        days_in_month = (next_month - month_start).days
+        if self.rnd.random() < 0.45:
+            day = days_in_month - self.rnd.randint(0, 2)
+        else:
+            day = self.rnd.randint(1, days_in_month)
+        moment = timezone.make_aware(datetime(
+            month_start.year, month_start.month, day, self.rnd.randint(9, 19), self.rnd.randint(0, 59), self.rnd.randint(0, 59)
+        ))
+        # Текущий месяц: переводы только в прошлом
+        if moment > self.now:
+            moment = self.now - timedelta(minutes=self.rnd.randint(1, 60 * 24 * 3))
+            if moment.date() < month_start:
+                moment = self.now
+        return moment
+
+    def create_transfers(self, accounts):
+        receivers = [account for account in accounts if account.participates_in_bonus]
+        if len(receivers) < 2:
+            return 0, 0
+        popularity = self.pareto_weights(len(receivers), 1.2)
+        by_department = {}
+        previous = 0
+        for account, cumulative in zip(receivers, popularity):
+            members, weights = by_department.setdefault(account.department_id, ([], []))
+            members.append(account)
+            weights.append((weights[-1] if weights else 0) + cumulative - previous)
+            previous = cumulative
+        reasons = [value for value, label in BonusTransfer.REASON_CHOICES]
+        read_before = self.now - timedelta(days=7)
+
+        transfers_total = 0
+        notifications_total = 0
+        transfers = []
+        notifications = []
+
+        def flush():
+            nonlocal transfers_total, notifications_total
+            with explicit_created_at(BonusTransfer, Notification):
+                BonusTransfer.objects.bulk_create(transfers, batch_size=BATCH_SIZE)
+                Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+            transfers_total += len(transfers)
+            notifications_total += len(notifications)
+            transfers.clear()
+            notifications.clear()
+
+        for month_start in month_starts(self.months):
+            for _ in range(int(len(accounts) * self.transfers_per_month)):
+                sender = self.rnd.choice(accounts)
+                members, weights = by_department.get(sender.department_id, (None, None))
+                if members and len(members) > 1 and self.rnd.random() < 0.6:
+                    receiver = self.rnd.choices(members, cum_weights=weights)[0]
+                else:
+                    receiver = self.rnd.choices(receivers, cum_weights=popularity)[0]
+                if receiver.pk == sender.pk:
+                    continue
+
+                created_at = self.transfer_moment(month_start)
+                amount = self.rnd.choices(AMOUNTS, AMOUNT_WEIGHTS)[0]
+                transfers.append(BonusTransfer(
+                    from_employee=sender, to_employee=receiver, amount=amount,
+                    reason=self.rnd.choice(reasons), review=self.rnd.choice(REVIEWS),
+                    created_at=created_at, notification_sent=True,
+                    is_deleted=self.rnd.random() < 0.01,
+                ))
+                notifications.append(Notification(
+                    user=receiver, type='transfer_received', title='Получен перевод',
+                    message=f'{sender.get_full_name()} перевел(а) вам {amount} руб.',
+                    is_read=created_at < read_before or self.rnd.random() < 0.3,
+                    created_at=created_at,
+                ))
+                if len(transfers) >= BATCH_SIZE * 5:
+                    flush()
+        flush()
+
+        unread = Notification.objects.filter(user=OuterRef('pk'), is_read=False).order_by().values('user').annotate(count=Count('id')).values('count')
+        Employee.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}').update(
+            unread_notifications_count=Coalesce(Subquery(unread), 0)
+        )
+        return transfers_total, notifications_total
@@ -0,0 +1,265 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPException
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from employees.models import Employee, BonusTransfer
+
+from .generate_synthetic_data import SYNTHETIC_DOMAIN
+from .run_benchmarks import percentile
+
+LOCKED_MESSAGE = b'database is locked'
+
+# Доли операций пользователя в день пиковых переводов
+DEFAULT_MIX = {'transfer': 5, 'rating': 3, 'notifications': 2}
+
+CSRF_INPUT_RE = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class Session:
+    """HTTP-сессия одного пользователя: постоянное соединение и cookie (без перехода по редиректам)"""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.cookies = {}
+        self.connection = None
+
+    def request(self, method, path, data=None):
+        headers = {'Cookie': '; '.join(f'{name}={value}' for name, value in self.cookies.items())}
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['X-CSRFToken'] = self.cookies.get('csrftoken', '')
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                content = response.read()
+                break
+            except (OSError, HTTPException):
+                # Сервер закрыл keep-alive соединение — одна повторная попытка
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            cookie = SimpleCookie(header)
+            for name, morsel in cookie.items():
+                self.cookies[name] = morsel.value
+        return response.status, content
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+class Stats:
+    """Итоги по операциям, общие для всех потоков"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.locked = defaultdict(int)
+
+    def add(self, operation, elapsed, ok, locked):
+        with self.lock:
+            self.latencies[operation].append(elapsed)
+            if not ok:
+                self.errors[operation] += 1
+            if locked:
+                self.locked[operation] += 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест работающего сервера в день пиковых переводов: синтетические пользователи '
+        '(generate_synthetic_data) входят через страницу входа и параллельно отправляют переводы, '
+        'читают рейтинг и опрашивают уведомления. Выводит пропускную способность, долю ошибок, '
+        'число ошибок "database is locked" и перцентили задержек по операциям. '
+        'Команда должна работать с той же базой, что и сервер.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Адрес работающего сервера')
+        parser.add_argument('--users', type=int, default=50, help='Число одновременных пользователей')
+        parser.add_argument('--duration', type=float, default=60, help='Длительность нагрузки, с')
+        parser.add_argument('--think', type=float, default=0.5, help='Средняя пауза пользователя между действиями, с')
+        parser.add_argument('--mix', default=','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()),
+                            help='Доли операций, например transfer=5,rating=3,notifications=2')
+        parser.add_argument('--amount', type=int, default=5, help='Сумма одного перевода')
+        parser.add_argument('--password', default='synthetic', help='Пароль синтетических пользователей')
+        parser.add_argument('--timeout', type=float, default=30, help='Таймаут запроса, с')
+        parser.add_argument('--seed', type=int, default=1, help='Зерно выбора действий')
+        parser.add_argument('--output', help='Сохранить итоги в JSON')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Поддерживается только http://хост:порт')
+        mix = self.parse_mix(options['mix'])
+
+        participants = list(
+            Employee.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}', is_active=True, participates_in_bonus=True)
+            .order_by('id').values_list('id', 'email')
+        )
+        if len(participants) < 2:
+            raise CommandError('Нет синтетических пользователей: выполните generate_synthetic_data')
+        users = participants[:options['users']]
+        receiver_ids = [employee_id for employee_id, email in participants]
+
+        paths = {
+            'login': reverse('login'),
+            'transfer': reverse('bonus_transfer'),
+            'rating': reverse('rating'),
+            'notifications': reverse('notifications_more'),
+        }
+        stats = Stats()
+        sessions = [Session(url.hostname, url.port or 80, options['timeout']) for _ in users]
+
+        def log_in(number):
+            return self.login(sessions[number], paths['login'], users[number][1], options['password'], stats)
+
+        def user_loop(number):
+            employee_id, email = users[number]
+            rnd = random.Random(options['seed'] * 100003 + number)
+            session = sessions[number]
+            while time.perf_counter() < deadline:
+                operation = rnd.choices(list(mix), list(mix.values()))[0]
+                if operation == 'transfer':
+                    receiver = rnd.choice(receiver_ids)
+                    if receiver == employee_id:
+                        continue
+                    self.timed(stats, 'transfer', session, 'POST', paths['transfer'], {
+                        'to_employee': receiver,
+                        'amount': options['amount'],
+                        'reason': 'teamwork',
+                        'explanation': 'Нагрузочный тест',
+                    }, expected=(302,))
+                elif operation == 'rating':
+                    self.timed(stats, 'rating', session, 'GET', paths['rating'])
+                else:
+                    self.timed(stats, 'notifications', session, 'GET', paths['notifications'])
+                time.sleep(rnd.expovariate(1 / options['think']) if options['think'] > 0 else 0)
+
+        self.stdout.write(f'Пользователей: {len(users)}, длительность: {options["duration"]:.0f} с, сервер: {options["url"]}')
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            # Сначала все входят (хеширование паролей не должно попадать в замер), затем общая нагрузка
+            logged_in = [number for number, ok in enumerate(pool.map(log_in, range(len(users)))) if ok]
+            if not logged_in:
+                raise CommandError('Ни один пользователь не смог войти: проверьте --password и адрес сервера')
+            self.stdout.write(f'Вошли: {len(logged_in)} из {len(users)}')
+
+            started_at = timezone.now()
+            wall_started = time.perf_counter()
+            deadline = wall_started + options['duration']
+            list(pool.map(user_loop, logged_in))
+            elapsed = time.perf_counter() - wall_started
+        for session in sessions:
+            session.close()
+
+        created = BonusTransfer.objects.filter(
+            created_at__gte=started_at, from_employee_id__in=[employee_id for employee_id, email in users]
+        ).count()
+        # Вход — подготовительная фаза, в итоги нагрузки он не входит
+        login_latencies = stats.latencies.pop('login', [])
+        login_errors = stats.errors.pop('login', 0)
+        stats.locked.pop('login', None)
+        report = self.report(stats, elapsed, created)
+        report['login_errors'] = login_errors
+        if login_latencies:
+            report['login_p50_ms'] = round(percentile(login_latencies, 0.5) * 1000, 1)
+            self.stdout.write(f'Вход: p50 {report["login_p50_ms"]} мс, ошибок входа: {login_errors}')
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'Результаты сохранены: {options["output"]}'))
+
+    def parse_mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            if name not in DEFAULT_MIX or not weight.isdigit():
+                raise CommandError(f'Неверная доля операции: {part}')
+            mix[name] = int(weight)
+        if not any(mix.values()):
+            raise CommandError('Все доли операций нулевые')
+        return mix
+
+    def login(self, session, path, email, password, stats):
+        """Вход через login_view так же, как из браузера: форма, CSRF-токен, POST"""
+        try:
+            status, content = session.request('GET', path)
+            token = CSRF_INPUT_RE.search(content)
+            data = {'login': email, 'password': password}
+            if token:
+                data['csrfmiddlewaretoken'] = token.group(1).decode()
+        except (OSError, HTTPException):
+            stats.add('login', 0, ok=False, locked=False)
+            return False
+        status, content = self.timed(stats, 'login', session, 'POST', path, data, expected=(302,))
+        return status == 302 and 'sessionid' in session.cookies
+
+    def timed(self, stats, operation, session, method, path, data=None, expected=(200,)):
+        started = time.perf_counter()
+        try:
+            status, content = session.request(method, path, data)
+        except (OSError, HTTPException):
+            status, content = 0, b''
+        elapsed = time.perf_counter() - started
+        # "database is locked" видно в теле ответа при DEBUG = True
+        stats.add(operation, elapsed, ok=status in expected, locked=LOCKED_MESSAGE in content)
+        return status, content
+
+    def report(self, stats, elapsed, created):
+        total = sum(len(values) for values in stats.latencies.values())
+        errors = sum(stats.errors.values())
+        locked = sum(stats.locked.values())
+        report = {
+            'duration_s': round(elapsed, 1),
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 1) if elapsed else 0,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'database_locked': locked,
+            'transfers_created': created,
+            'transfers_per_s': round(created / elapsed, 1) if elapsed else 0,
+            'operations': {},
+        }
+        self.stdout.write(
+            f'Запросов: {total} за {elapsed:.1f} с ({report["throughput_rps"]} в секунду), '
+            f'ошибок: {errors} ({report["error_rate"] * 100:.1f}%), database is locked: {locked}'
+        )
+        self.stdout.write(f'Проведено переводов (по базе): {created} ({report["transfers_per_s"]} в секунду)')
+        for operation, latencies in sorted(stats.latencies.items()):
+            result = {
+                'requests': len(latencies),
+                'errors': stats.errors[operation],
+                'database_locked': stats.locked[operation],
+                'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+            }
+            report['operations'][operation] = result
+            self.stdout.write(
+                f'  {operation:<14} {result["requests"]:>6} запросов  ошибок {result["errors"]:>4}  '
+                f'locked {result["database_locked"]:>4}  p50 {result["p50_ms"]:>8.1f} мс  '
+                f'p95 {result["p95_ms"]:>8.1f} мс  p99 {result["p99_ms"]:>8.1f} мс'
+            )
+        style = self.style.ERROR if errors or locked else self.style.SUCCESS
+        self.stdout.write(style('Ошибок нет' if not (errors or locked) else 'Есть ошибки под нагрузкой'))
+        return report
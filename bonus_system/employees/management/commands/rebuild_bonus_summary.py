@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from employees import leaderboard
+from employees.models import MonthlyBonusSummary
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает помесячные итоги полученных переводов (таблица рейтинга)'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = MonthlyBonusSummary.rebuild()
+        # Итоги пересчитаны в обход переводов — версии реестра не менялись
+        leaderboard.invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f'Итоги пересчитаны: {count} записей'))
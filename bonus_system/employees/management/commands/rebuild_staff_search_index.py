@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from employees.models import StaffMember
+from employees.search import search_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс справочника сотрудников (FTS5, только SQLite)'
+
+    def handle(self, *args, **options):
+        if not search_available():
+            raise CommandError('Поисковый индекс поддерживается только для SQLite')
+        with transaction.atomic():
+            count = rebuild_index(StaffMember.objects.only('last_name', 'first_name', 'middle_name', 'email', 'phone').iterator())
+        self.stdout.write(self.style.SUCCESS(f'Индекс пересобран: {count} сотрудников'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'Сбрасывает месячный баланс бонусных рублей всем участникам премирования (запускать 1-го числа каждого месяца)'
+
+    def handle(self, *args, **options):
+        updated = Employee.reset_all_monthly_balances()
+        period = Employee.current_balance_period()
+        self.stdout.write(self.style.SUCCESS(f'Баланс за {period:%m.%Y} сброшен: {updated} сотрудников'))
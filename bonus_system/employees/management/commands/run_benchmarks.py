@@ -0,0 +1,212 @@
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from employees.exports import registry_transfers, write_transfers_excel, write_transfers_pdf
+from employees.models import Employee, StaffMember, BonusTransfer, Notification
+from employees.periods import current_period
+
+from .generate_synthetic_data import SYNTHETIC_DOMAIN, clear_synthetic_data
+
+# Страницы: имя замера -> (имя URL, параметры запроса)
+VIEWS = {
+    'home': ('home', {}),
+    'rating_month': ('rating', {'period': 'month'}),
+    'rating_quarter': ('rating', {'period': 'quarter'}),
+    'rating_year': ('rating', {'period': 'year'}),
+    'reviews_list': ('reviews_list', {}),
+    'bonus_transfer': ('bonus_transfer', {}),
+    'roster': ('roster', {}),
+}
+
+EXPORTS = {
+    'export_excel': write_transfers_excel,
+    'export_pdf': write_transfers_pdf,
+}
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(run, repeat):
+    """
+    Задержка первого (холодного) и повторных вызовов run, число SQL-запросов
+    и пик памяти Python (tracemalloc, отдельным вызовом — он замедляет код).
+    """
+    timings = []
+    queries = []
+    for _ in range(repeat + 1):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        queries.append(counter.count)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    first, warm = timings[0], timings[1:] or timings
+    return {
+        'first_ms': round(first * 1000, 2),
+        'p50_ms': round(percentile(warm, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(warm, 0.95) * 1000, 2),
+        'mean_ms': round(statistics.mean(warm) * 1000, 2),
+        'queries_first': queries[0],
+        'queries': queries[-1],
+        'peak_memory_kb': peak // 1024,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеры производительности страниц (главная, рейтинг, отзывы, начисление) и выгрузок реестра '
+        'на синтетических данных разного масштаба: p50/p95 задержки, число запросов и пик памяти. '
+        'Для каждого масштаба заново генерирует набор командой generate_synthetic_data. '
+        'Результаты сохраняются в JSON для сравнения запусков (--baseline). Запускайте на копии базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000, 100000], help='Размеры справочника')
+        parser.add_argument('--repeat', type=int, default=10, help='Повторов каждой страницы')
+        parser.add_argument('--export-repeat', type=int, default=2, help='Повторов каждой выгрузки')
+        parser.add_argument('--seed', type=int, default=1, help='Зерно генератора данных')
+        parser.add_argument('--existing', action='store_true', help='Замерить текущие данные базы без генерации')
+        parser.add_argument('--keep', action='store_true', help='Не удалять синтетический набор после замеров')
+        parser.add_argument('--output', help='Файл результатов (по умолчанию benchmarks/benchmark_<время>.json)')
+        parser.add_argument('--baseline', help='Файл прошлого запуска для сравнения')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = json.loads(Path(options['baseline']).read_text(encoding='utf-8'))
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Не удалось прочитать {options["baseline"]}: {error}')
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'repeat': options['repeat'],
+            'export_repeat': options['export_repeat'],
+            'scales': [],
+        }
+
+        try:
+            if options['existing']:
+                report['scales'].append(self.run_scale(None, options))
+            else:
+                for staff in options['scales']:
+                    started = time.perf_counter()
+                    call_command('generate_synthetic_data', staff=staff, clear=True, seed=options['seed'], stdout=self.stdout)
+                    scale = self.run_scale(staff, options)
+                    scale['generate_seconds'] = round(time.perf_counter() - started, 1)
+                    report['scales'].append(scale)
+        finally:
+            if not options['existing'] and not options['keep']:
+                clear_synthetic_data()
+
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'benchmarks' / f'benchmark_{timezone.localtime():%Y%m%d_%H%M%S}.json')
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f'Результаты сохранены: {output}'))
+
+        if baseline:
+            self.compare(baseline, report)
+
+    def run_scale(self, staff, options):
+        user = self.benchmark_user()
+        scale = {
+            'staff': StaffMember.objects.count() if staff is None else staff,
+            'employees': Employee.objects.count(),
+            'transfers': BonusTransfer.objects.count(),
+            'notifications': Notification.objects.count(),
+            'results': {},
+        }
+        self.stdout.write(f'\nМасштаб: {scale["staff"]} сотрудников, {scale["transfers"]} переводов')
+
+        client = Client()
+        client.force_login(user)
+        for name, (url_name, params) in VIEWS.items():
+            def run(url_name=url_name, params=params):
+                response = client.get(reverse(url_name), params)
+                if response.status_code != 200:
+                    raise CommandError(f'{url_name}: ответ {response.status_code}')
+            self.record(scale, name, measure(run, options['repeat']))
+
+        # Реестр за прошлый месяц: он полностью заполнен переводами
+        period = current_period('month')
+        last_month = period.first_month - timedelta(days=1)
+        for name, writer in EXPORTS.items():
+            def run(writer=writer):
+                with tempfile.TemporaryFile() as output:
+                    writer(output, registry_transfers(last_month.year, last_month.month), last_month.year, last_month.month)
+            self.record(scale, name, measure(run, options['export_repeat']))
+        return scale
+
+    def benchmark_user(self):
+        """Обычный пользователь-участник: синтетический, если набор сгенерирован"""
+        users = Employee.objects.filter(is_active=True, is_admin=False, participates_in_bonus=True)
+        user = users.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}').order_by('id').first() or users.order_by('id').first()
+        if user is None:
+            raise CommandError('В базе нет пользователей для замеров')
+        return user
+
+    def record(self, scale, name, result):
+        scale['results'][name] = result
+        self.stdout.write(
+            f'  {name:<16} p50 {result["p50_ms"]:>9.1f} мс  p95 {result["p95_ms"]:>9.1f} мс  '
+            f'первый {result["first_ms"]:>9.1f} мс  запросов {result["queries_first"]}/{result["queries"]}  '
+            f'память {result["peak_memory_kb"]} КБ'
+        )
+
+    def compare(self, baseline, report):
+        """Изменение p50 и пика памяти относительно прошлого запуска на тех же масштабах"""
+        previous = {scale['staff']: scale['results'] for scale in baseline.get('scales', [])}
+        self.stdout.write('\nСравнение с прошлым запуском (p50, память):')
+        for scale in report['scales']:
+            old_results = previous.get(scale['staff'])
+            if not old_results:
+                continue
+            self.stdout.write(f'Масштаб {scale["staff"]}:')
+            for name, result in scale['results'].items():
+                old = old_results.get(name)
+                if not old:
+                    continue
+                latency = (result['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+                memory = result['peak_memory_kb'] - old['peak_memory_kb']
+                line = f'  {name:<16} p50 {old["p50_ms"]:.1f} -> {result["p50_ms"]:.1f} мс ({latency:+.0f}%), память {memory:+d} КБ'
+                style = self.style.ERROR if latency > 20 else self.style.SUCCESS if latency < -20 else str
+                self.stdout.write(style(line))
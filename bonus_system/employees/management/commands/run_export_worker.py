@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from employees.exports import build_export_job
+from employees.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = 'Фоновый обработчик заданий на выгрузку реестра премий (файлы сохраняются в MEDIA_ROOT/exports/)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Обработать очередь и завершить работу')
+        parser.add_argument('--interval', type=float, default=2.0, help='Пауза между проверками очереди, сек.')
+
+    def handle(self, *args, **options):
+        # Задания, прерванные при прошлой остановке обработчика, возвращаем в очередь
+        ExportJob.objects.filter(status='running').update(status='pending')
+
+        while True:
+            processed = self.process_pending()
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+
+    def process_pending(self):
+        processed = 0
+        for job_id in ExportJob.objects.filter(status='pending').values_list('id', flat=True):
+            # Захватываем задание условным UPDATE, чтобы не собрать его дважды
+            if not ExportJob.objects.filter(id=job_id, status='pending').update(status='running'):
+                continue
+            job = ExportJob.objects.get(id=job_id)
+            try:
+                build_export_job(job)
+                self.stdout.write(self.style.SUCCESS(f'Готово: {job}'))
+            except Exception as e:
+                ExportJob.objects.filter(id=job_id).update(status='failed', error=str(e))
+                self.stderr.write(f'Ошибка при формировании {job}: {e}')
+            processed += 1
+        return processed
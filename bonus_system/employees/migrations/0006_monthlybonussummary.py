@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+
+
+def fill_monthly_summaries(apps, schema_editor):
+    BonusTransfer = apps.get_model('employees', 'BonusTransfer')
+    MonthlyBonusSummary = apps.get_model('employees', 'MonthlyBonusSummary')
+    rows = (
+        BonusTransfer.objects.filter(is_deleted=False)
+        .annotate(month=TruncMonth('created_at', output_field=models.DateField()))
+        .values('to_employee_id', 'month')
+        .annotate(total=models.Sum('amount'), count=models.Count('id'))
+        .order_by()
+    )
+    MonthlyBonusSummary.objects.bulk_create([
+        MonthlyBonusSummary(employee_id=row['to_employee_id'], month=row['month'],
+                            total_amount=row['total'], transfers_count=row['count'])
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_systemsettings_employee_participates_in_bonus_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyBonusSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Сумма полученных переводов')),
+                ('transfers_count', models.IntegerField(default=0, verbose_name='Количество переводов')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to=settings.AUTH_USER_MODEL, verbose_name='Сотрудник')),
+            ],
+            options={
+                'verbose_name': 'Итоги месяца по сотруднику',
+                'verbose_name_plural': 'Итоги месяца по сотрудникам',
+                'unique_together': {('employee', 'month')},
+            },
+        ),
+        migrations.RunPython(fill_monthly_summaries, migrations.RunPython.noop),
+    ]
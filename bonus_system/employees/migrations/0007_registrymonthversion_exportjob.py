@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0006_monthlybonussummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistryMonthVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True, verbose_name='Месяц')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Версия данных')),
+            ],
+            options={
+                'verbose_name': 'Версия реестра за месяц',
+                'verbose_name_plural': 'Версии реестров за месяц',
+            },
+        ),
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('format', models.CharField(choices=[('excel', 'Excel'), ('pdf', 'PDF')], max_length=10, verbose_name='Формат')),
+                ('data_version', models.PositiveIntegerField(verbose_name='Версия данных')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Формируется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('file', models.FileField(blank=True, null=True, upload_to='exports/', verbose_name='Файл реестра')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Запросил')),
+            ],
+            options={
+                'verbose_name': 'Задание на выгрузку реестра',
+                'verbose_name_plural': 'Задания на выгрузку реестра',
+                'ordering': ['created_at'],
+                'unique_together': {('month', 'format', 'data_version')},
+            },
+        ),
+    ]
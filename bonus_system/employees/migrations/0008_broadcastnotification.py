@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_registrymonthversion_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='last_seen_broadcast_id',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Последнее прочитанное общее уведомление'),
+        ),
+        migrations.CreateModel(
+            name='BroadcastNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('transfer_received', 'Получен перевод'), ('transfer_cancelled', 'Перевод отменен'), ('news', 'Новость'), ('system', 'Системное')], default='news', max_length=20, verbose_name='Тип уведомления')),
+                ('title', models.CharField(max_length=200, verbose_name='Заголовок')),
+                ('message', models.TextField(verbose_name='Сообщение')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcast_notifications', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Общее уведомление',
+                'verbose_name_plural': 'Общие уведомления',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:16
+
+from django.db import migrations, models
+
+
+def fill_unread_counts(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    Notification = apps.get_model('employees', 'Notification')
+    unread = (
+        Notification.objects.filter(is_read=False)
+        .values('user_id')
+        .annotate(count=models.Count('id'))
+        .order_by()
+    )
+    for row in unread:
+        Employee.objects.filter(pk=row['user_id']).update(unread_notifications_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_broadcastnotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='notifications_version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Версия списка уведомлений'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='unread_notifications_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Непрочитанных уведомлений'),
+        ),
+        migrations.RunPython(fill_unread_counts, migrations.RunPython.noop),
+    ]
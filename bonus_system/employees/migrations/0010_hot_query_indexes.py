@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('employees', '0009_employee_unread_notifications_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bonustransfer',
+            index=models.Index(fields=['to_employee', 'is_deleted', 'created_at'], name='transfer_to_deleted_created'),
+        ),
+        migrations.AddIndex(
+            model_name='bonustransfer',
+            index=models.Index(fields=['is_deleted', 'created_at'], name='transfer_deleted_created'),
+        ),
+        migrations.AddIndex(
+            model_name='bonustransfer',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at'], name='transfer_active_created'),
+        ),
+        migrations.AddIndex(
+            model_name='bonustransfer',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['to_employee', 'created_at'], name='transfer_to_active_created'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['last_name', 'first_name', 'middle_name'], name='employee_fio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', 'created_at'], name='notification_user_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffmember',
+            index=models.Index(fields=['last_name', 'first_name', 'middle_name'], name='staffmember_fio_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+import re
+
+from django.db import migrations
+
+# Схема и наполнение индекса зафиксированы здесь, а не импортируются из employees.search:
+# изменения модуля не должны менять то, что делает уже примененная миграция
+SEARCH_TABLE = 'employees_staffmember_search'
+
+
+def normalize(text):
+    return (text or '').lower().replace('ё', 'е')
+
+
+def phone_variants(phone):
+    digits = re.sub(r'\D', '', phone or '')
+    if not digits:
+        return ''
+    variants = [digits, digits[-10:]]
+    if len(digits) == 11 and digits[0] in '78':
+        variants.append(('8' if digits[0] == '7' else '7') + digits[1:])
+    return ' '.join(dict.fromkeys(variants))
+
+
+def create_search_table(apps, schema_editor):
+    # FTS5 есть только в SQLite; на других СУБД поиск работает через icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    StaffMember = apps.get_model('employees', 'StaffMember')
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} '
+        f"USING fts5(name, email, phone, tokenize = 'unicode61 remove_diacritics 0')"
+    )
+    rows = [
+        (
+            staff.pk,
+            normalize(' '.join(filter(None, [staff.last_name, staff.first_name, staff.middle_name]))),
+            normalize(staff.email),
+            phone_variants(staff.phone),
+        )
+        for staff in StaffMember.objects.using(schema_editor.connection.alias).iterator()
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, email, phone) VALUES (%s, %s, %s, %s)',
+            rows
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0010_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0011_staffmember_search'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bonustransfer',
+            name='transfer_to_deleted_created',
+        ),
+        migrations.RemoveIndex(
+            model_name='bonustransfer',
+            name='transfer_deleted_created',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_user_read_idx',
+        ),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import date
+import copy
+import uuid
 
 
 class Department(models.Model):
@@ -65,6 +69,14 @@ class Employee(AbstractUser):
     # Участие в системе премирования (управляется администратором)
     participates_in_bonus = models.BooleanField(default=True, verbose_name='Участвует в системе премирования')
     
+    # Последнее прочитанное общее уведомление (все BroadcastNotification с большим id — непрочитанные)
+    last_seen_broadcast_id = models.PositiveBigIntegerField(default=0, verbose_name='Последнее прочитанное общее уведомление')
+    
+    # Денормализованный счетчик непрочитанных личных уведомлений и версия их списка
+    # (обновляются в Notification.save и notifications.mark_all_read)
+    unread_notifications_count = models.PositiveIntegerField(default=0, verbose_name='Непрочитанных уведомлений')
+    notifications_version = models.PositiveIntegerField(default=0, verbose_name='Версия списка уведомлений')
+    
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'phone']
     
@@ -90,6 +102,10 @@ class Employee(AbstractUser):
     class Meta:
         verbose_name = 'Сотрудник'
         verbose_name_plural = 'Сотрудники'
+        indexes = [
+            # Сопоставление со справочником по ФИО
+            models.Index(fields=['last_name', 'first_name', 'middle_name'], name='employee_fio_idx'),
+        ]
     
     def __str__(self):
         return f"{self.last_name} {self.first_name} {self.middle_name}".strip()
@@ -97,18 +113,49 @@ class Employee(AbstractUser):
     def get_full_name(self):
         return f"{self.last_name} {self.first_name} {self.middle_name}".strip()
     
+    @staticmethod
+    def current_balance_period():
+        """Первое число текущего месяца — период, к которому относится месячный баланс"""
+        return timezone.localdate().replace(day=1)
+    
     def reset_monthly_balance(self):
-        """Сброс баланса бонусных рублей каждый месяц"""
-        today = date.today()
-        if self.last_balance_reset.month != today.month or self.last_balance_reset.year != today.year:
-            try:
-                settings = SystemSettings.get_settings()
-                self.monthly_bonus_balance = settings.monthly_bonus_amount
-            except:
-                # Если настройки еще не созданы, используем значение по умолчанию
-                self.monthly_bonus_balance = 1000.00
+        """
+        Сброс баланса бонусных рублей, если в этом месяце он еще не сбрасывался.
+        Обычно всех сбрасывает команда reset_monthly_balances, поэтому здесь
+        достаточно сравнения в памяти; иначе — условный UPDATE только этой строки.
+        """
+        period_start = self.current_balance_period()
+        if self.last_balance_reset >= period_start:
+            return
+        
+        amount = SystemSettings.get_settings().monthly_bonus_amount
+        today = timezone.localdate()
+        updated = Employee.objects.filter(pk=self.pk, last_balance_reset__lt=period_start).update(
+            monthly_bonus_balance=amount,
+            last_balance_reset=today,
+        )
+        if updated:
+            self.monthly_bonus_balance = amount
             self.last_balance_reset = today
-            self.save()
+        else:
+            # Баланс уже сброшен параллельным запросом или командой
+            self.refresh_from_db(fields=['monthly_bonus_balance', 'last_balance_reset'])
+    
+    @classmethod
+    def reset_all_monthly_balances(cls):
+        """
+        Сброс месячного баланса всех участников премирования одним условным UPDATE.
+        Блокировок нет: повторный или параллельный запуск (как и сброс при первом
+        запросе сотрудника) не найдет строк с last_balance_reset раньше начала месяца,
+        поэтому баланс за месяц сбрасывается ровно один раз. Баланс сотрудника,
+        которого вернули в премирование, сбросит его первый запрос (reset_monthly_balance).
+        """
+        period_start = cls.current_balance_period()
+        amount = SystemSettings.get_settings().monthly_bonus_amount
+        return cls.objects.filter(participates_in_bonus=True, last_balance_reset__lt=period_start).update(
+            monthly_bonus_balance=amount,
+            last_balance_reset=timezone.localdate(),
+        )
 
 
 class News(models.Model):
@@ -154,6 +201,13 @@ class BonusTransfer(models.Model):
         verbose_name = 'Перевод бонусов'
         verbose_name_plural = 'Переводы бонусов'
         ordering = ['-created_at']
+        indexes = [
+            # Частичные индексы только по неудаленным переводам: ленты отзывов, реестр
+            # и полученные переводы сотрудника за период. Django записывает is_deleted=False
+            # как NOT is_deleted, и SQLite может учесть это условие только через частичный индекс
+            models.Index(fields=['created_at'], condition=models.Q(is_deleted=False), name='transfer_active_created'),
+            models.Index(fields=['to_employee', 'created_at'], condition=models.Q(is_deleted=False), name='transfer_to_active_created'),
+        ]
     
     def __str__(self):
         return f"{self.from_employee} -> {self.to_employee}: {self.amount} руб."
@@ -179,9 +233,192 @@ class Notification(models.Model):
         verbose_name = 'Уведомление'
         verbose_name_plural = 'Уведомления'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], condition=models.Q(is_read=False), name='notification_user_unread_idx'),
+            models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user} - {self.title}"
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            read_changed = 0
+            if not adding and (update_fields is None or 'is_read' in update_fields):
+                # Условный UPDATE: счетчик меняется, только если прочитанность действительно изменилась
+                read_changed = Notification.objects.filter(pk=self.pk).exclude(is_read=self.is_read).update(is_read=self.is_read)
+            super().save(*args, **kwargs)
+            if adding and not self.is_read:
+                # Новое непрочитанное уведомление: увеличиваем счетчик пользователя
+                self._change_unread_count(1)
+            elif read_changed:
+                self._change_unread_count(-1 if self.is_read else 1)
+    
+    def delete(self, *args, **kwargs):
+        # Удаление через QuerySet (и каскадом вместе с пользователем) счетчик не меняет,
+        # как и bulk_create: после массовых операций он пересчитывается отдельно
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self._change_unread_count(0 if self.is_read else -1)
+        return result
+    
+    def _change_unread_count(self, delta):
+        Employee.objects.filter(pk=self.user_id).update(
+            unread_notifications_count=Greatest(models.F('unread_notifications_count') + delta, models.Value(0)),
+            notifications_version=models.F('notifications_version') + 1,
+        )
+
+
+class BroadcastNotification(models.Model):
+    """
+    Уведомление для всех пользователей (например, о новости).
+    Хранится одной записью; прочитанность определяется по Employee.last_seen_broadcast_id.
+    """
+    type = models.CharField(max_length=20, choices=Notification.TYPE_CHOICES, default='news', verbose_name='Тип уведомления')
+    title = models.CharField(max_length=200, verbose_name='Заголовок')
+    message = models.TextField(verbose_name='Сообщение')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    author = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name='broadcast_notifications', verbose_name='Автор')
+    
+    class Meta:
+        verbose_name = 'Общее уведомление'
+        verbose_name_plural = 'Общие уведомления'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return self.title
+    
+    @classmethod
+    def visible_to(cls, user):
+        """Общие уведомления, адресованные пользователю: созданные после его регистрации и не им самим"""
+        return cls.objects.filter(created_at__gte=user.date_joined).exclude(author=user)
+
+
+class MonthlyBonusSummary(models.Model):
+    """Итоги полученных переводов сотрудника за месяц (для рейтинга)"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='monthly_summaries', verbose_name='Сотрудник')
+    month = models.DateField(verbose_name='Месяц')  # Первое число месяца
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Сумма полученных переводов')
+    transfers_count = models.IntegerField(default=0, verbose_name='Количество переводов')
+
+    class Meta:
+        verbose_name = 'Итоги месяца по сотруднику'
+        verbose_name_plural = 'Итоги месяца по сотрудникам'
+        unique_together = ('employee', 'month')
+
+    def __str__(self):
+        return f"{self.employee} - {self.month:%m.%Y}: {self.total_amount} руб."
+
+    @staticmethod
+    def month_of(moment):
+        """Первое число месяца (в часовом поясе проекта) для даты перевода"""
+        return timezone.localtime(moment).date().replace(day=1)
+
+    @classmethod
+    def apply_transfer(cls, transfer, sign=1):
+        """
+        Учет перевода в итогах месяца получателя.
+        sign=1 — новый перевод, sign=-1 — отмена перевода.
+        Вызывать внутри той же транзакции, что и изменение перевода.
+        """
+        summary, created = cls.objects.get_or_create(
+            employee_id=transfer.to_employee_id,
+            month=cls.month_of(transfer.created_at),
+        )
+        cls.objects.filter(pk=summary.pk).update(
+            total_amount=models.F('total_amount') + sign * transfer.amount,
+            transfers_count=models.F('transfers_count') + sign,
+        )
+
+    @classmethod
+    def rebuild(cls):
+        """Полный пересчет итогов по неудаленным переводам"""
+        from django.db.models.functions import TruncMonth
+
+        rows = (
+            BonusTransfer.objects.filter(is_deleted=False)
+            .annotate(month=TruncMonth('created_at', output_field=models.DateField()))
+            .values('to_employee_id', 'month')
+            .annotate(total=models.Sum('amount'), count=models.Count('id'))
+            .order_by()
+        )
+        summaries = [
+            cls(employee_id=row['to_employee_id'], month=row['month'],
+                total_amount=row['total'], transfers_count=row['count'])
+            for row in rows
+        ]
+        cls.objects.all().delete()
+        cls.objects.bulk_create(summaries, batch_size=500)
+        return len(summaries)
+
+
+class RegistryMonthVersion(models.Model):
+    """Версия данных реестра премий за месяц — растет при каждом изменении переводов месяца"""
+    month = models.DateField(unique=True, verbose_name='Месяц')  # Первое число месяца
+    version = models.PositiveIntegerField(default=0, verbose_name='Версия данных')
+
+    class Meta:
+        verbose_name = 'Версия реестра за месяц'
+        verbose_name_plural = 'Версии реестров за месяц'
+
+    def __str__(self):
+        return f"{self.month:%m.%Y} v{self.version}"
+
+    @classmethod
+    def current(cls, month):
+        row = cls.objects.filter(month=month).values_list('version', flat=True).first()
+        return row or 0
+
+    @classmethod
+    def bump(cls, moment):
+        """Новая версия реестра месяца, в который попадает перевод"""
+        version, created = cls.objects.get_or_create(month=MonthlyBonusSummary.month_of(moment))
+        cls.objects.filter(pk=version.pk).update(version=models.F('version') + 1)
+
+    @classmethod
+    def bump_months(cls, months):
+        """Новые версии реестров нескольких месяцев (первые числа) за два запроса"""
+        months = set(months)
+        if not months:
+            return
+        cls.objects.bulk_create([cls(month=month) for month in months], ignore_conflicts=True)
+        cls.objects.filter(month__in=months).update(version=models.F('version') + 1)
+
+
+class ExportJob(models.Model):
+    """Задание на формирование реестра премий (выполняется командой run_export_worker)"""
+    FORMAT_CHOICES = [
+        ('excel', 'Excel'),
+        ('pdf', 'PDF'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('running', 'Формируется'),
+        ('done', 'Готово'),
+        ('failed', 'Ошибка'),
+    ]
+
+    month = models.DateField(verbose_name='Месяц')  # Первое число месяца
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, verbose_name='Формат')
+    data_version = models.PositiveIntegerField(verbose_name='Версия данных')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    file = models.FileField(upload_to='exports/', blank=True, null=True, verbose_name='Файл реестра')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    requested_by = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name='export_jobs', verbose_name='Запросил')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата завершения')
+
+    class Meta:
+        verbose_name = 'Задание на выгрузку реестра'
+        verbose_name_plural = 'Задания на выгрузку реестра'
+        unique_together = ('month', 'format', 'data_version')
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.month:%m.%Y} {self.format} v{self.data_version} ({self.get_status_display()})"
 
 
 class Holiday(models.Model):
@@ -230,6 +467,10 @@ class StaffMember(models.Model):
         verbose_name = 'Сотрудник компании'
         verbose_name_plural = 'Сотрудники компании'
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Сопоставление с учетными записями по ФИО
+            models.Index(fields=['last_name', 'first_name', 'middle_name'], name='staffmember_fio_idx'),
+        ]
     
     def __str__(self):
         return f"{self.last_name} {self.first_name} {self.middle_name}".strip()
@@ -247,13 +488,41 @@ class SystemSettings(models.Model):
         verbose_name = 'Настройка системы'
         verbose_name_plural = 'Настройки системы'
     
+    # Копия настроек в памяти процесса: (версия, экземпляр).
+    # Версия хранится в общем кэше и меняется при каждом сохранении,
+    # поэтому остальные процессы перечитывают запись только после изменения.
+    VERSION_CACHE_KEY = 'system_settings:version'
+    _process_cache = None
+    
     def save(self, *args, **kwargs):
         # Оставляем только одну запись настроек
         self.pk = 1
         super().save(*args, **kwargs)
+        SystemSettings._process_cache = None
+        # Новая версия публикуется после фиксации: иначе другой процесс успеет
+        # закэшировать старые настройки под новой версией
+        transaction.on_commit(lambda: cache.set(self.VERSION_CACHE_KEY, uuid.uuid4().hex, None))
+    
+    @classmethod
+    def get_version(cls):
+        """Текущая версия настроек (меняется при каждом сохранении)"""
+        version = cache.get(cls.VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(cls.VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+            version = cache.get(cls.VERSION_CACHE_KEY)
+        return version
     
     @classmethod
     def get_settings(cls):
-        settings, created = cls.objects.get_or_create(pk=1)
-        return settings
+        version = cls.get_version()
+        
+        cached = cls._process_cache
+        if cached is None or cached[0] != version:
+            settings, created = cls.objects.get_or_create(pk=1)
+            if created:
+                # Создание записи само сменило версию
+                version = cache.get(cls.VERSION_CACHE_KEY)
+            cached = cls._process_cache = (version, settings)
+        # Отдаем копию, чтобы изменения в представлении не попали в общий экземпляр
+        return copy.copy(cached[1])
 
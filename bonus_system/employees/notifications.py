@@ -0,0 +1,136 @@
+"""
+Личные и общие уведомления пользователя, объединяемые при чтении.
+
+Счетчик непрочитанных личных уведомлений хранится в Employee.unread_notifications_count,
+поэтому на обычной странице уведомления не требуют запросов к базе: число общих
+непрочитанных уведомлений и список для выпадающего меню берутся из кэша по ключу,
+включающему версии данных пользователя.
+"""
+from heapq import merge
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from . import live
+from .models import Employee, Notification, BroadcastNotification
+from .pagination import PAGE_SIZE, encode_cursor, decode_cursor, before
+
+LATEST_BROADCAST_KEY = 'notifications:latest_broadcast_id'
+# Другие процессы увидят новое общее уведомление не позже чем через это время
+LATEST_BROADCAST_TIMEOUT = 60
+NOTIFICATIONS_CACHE_TIMEOUT = 60 * 60 * 24
+DROPDOWN_LIMIT = 10
+
+# Вид записи в объединенной ленте; при равном времени личные идут раньше общих
+PERSONAL = 1
+BROADCAST = 0
+
+
+def _mark_broadcasts(user, broadcasts):
+    # Общие уведомления новее отметки пользователя считаются непрочитанными
+    for broadcast in broadcasts:
+        broadcast.is_read = broadcast.id <= user.last_seen_broadcast_id
+    return broadcasts
+
+
+def latest_broadcast_id():
+    """id последнего общего уведомления (кэшируется)"""
+    latest_id = cache.get(LATEST_BROADCAST_KEY)
+    if latest_id is None:
+        latest_id = BroadcastNotification.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        cache.set(LATEST_BROADCAST_KEY, latest_id, LATEST_BROADCAST_TIMEOUT)
+    return latest_id
+
+
+def broadcast(title, message, author=None, type='news'):
+    """Публикует общее уведомление одной записью"""
+    notification = BroadcastNotification.objects.create(type=type, title=title, message=message, author=author)
+    cache.set(LATEST_BROADCAST_KEY, notification.id, LATEST_BROADCAST_TIMEOUT)
+    live.publish_broadcast(notification)
+    return notification
+
+
+def unread_count(user):
+    """Количество непрочитанных личных и общих уведомлений"""
+    latest_id = latest_broadcast_id()
+    if latest_id <= user.last_seen_broadcast_id:
+        return user.unread_notifications_count
+    
+    key = f'notifications:unread_broadcasts:{user.id}:{user.last_seen_broadcast_id}:{latest_id}'
+    broadcasts = cache.get(key)
+    if broadcasts is None:
+        broadcasts = BroadcastNotification.visible_to(user).filter(id__gt=user.last_seen_broadcast_id).count()
+        cache.set(key, broadcasts, NOTIFICATIONS_CACHE_TIMEOUT)
+    return user.unread_notifications_count + broadcasts
+
+
+def _feed_key(notification):
+    kind = BROADCAST if isinstance(notification, BroadcastNotification) else PERSONAL
+    return notification.created_at, kind, notification.id
+
+
+def notifications_page(user, cursor=None, page_size=PAGE_SIZE):
+    """
+    Страница объединенной ленты личных и общих уведомлений от новых к старым.
+    Каждый источник читается по ключу (created_at, id) не более чем на page_size + 1 записей.
+    Возвращает (уведомления, курсор следующей страницы или None).
+    """
+    personal = Notification.objects.filter(user=user)
+    broadcasts = BroadcastNotification.visible_to(user)
+
+    position = decode_cursor(cursor, keys=2)
+    if position is not None:
+        created_at, kind, pk = position
+        # Позиция в ленте сравнивается как кортеж (created_at, вид, id)
+        if kind == PERSONAL:
+            personal = personal.filter(before(created_at, pk))
+            broadcasts = broadcasts.filter(created_at__lte=created_at)
+        else:
+            personal = personal.filter(created_at__lt=created_at)
+            broadcasts = broadcasts.filter(before(created_at, pk))
+
+    personal = personal.order_by('-created_at', '-id')[:page_size + 1]
+    broadcasts = _mark_broadcasts(user, list(broadcasts.order_by('-created_at', '-id')[:page_size + 1]))
+    items = list(merge(personal, broadcasts, key=_feed_key, reverse=True))
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, encode_cursor(*_feed_key(items[-1]))
+
+
+def user_notifications(user, limit=DROPDOWN_LIMIT):
+    """Последние limit личных и общих уведомлений пользователя, от новых к старым"""
+    return notifications_page(user, page_size=limit)[0]
+
+
+def dropdown_version(user):
+    """Версия выпадающего меню: меняется с личными уведомлениями, прочтением и новыми общими уведомлениями"""
+    return f'{user.notifications_version}:{user.last_seen_broadcast_id}:{latest_broadcast_id()}'
+
+
+def dropdown_notifications(user):
+    """Последние уведомления для выпадающего меню (кэшируются до изменения данных пользователя)"""
+    key = f'notifications:dropdown:{user.id}:{dropdown_version(user)}'
+    notifications = cache.get(key)
+    if notifications is None:
+        notifications = user_notifications(user, limit=DROPDOWN_LIMIT)
+        cache.set(key, notifications, NOTIFICATIONS_CACHE_TIMEOUT)
+    return notifications
+
+
+def mark_all_read(user):
+    """Отмечает все личные и общие уведомления пользователя как прочитанные"""
+    last_broadcast_id = BroadcastNotification.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    with transaction.atomic():
+        marked = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+        # Вычитаем ровно отмеченные, чтобы не потерять уведомления, созданные параллельно
+        Employee.objects.filter(pk=user.pk).update(
+            unread_notifications_count=Greatest(F('unread_notifications_count') - marked, Value(0)),
+            notifications_version=F('notifications_version') + 1,
+            last_seen_broadcast_id=Greatest(F('last_seen_broadcast_id'), Value(last_broadcast_id)),
+        )
+        # Другие вкладки пользователя сбросят счетчик
+        live.publish_state(user.pk)
+    user.refresh_from_db(fields=['unread_notifications_count', 'notifications_version', 'last_seen_broadcast_id'])
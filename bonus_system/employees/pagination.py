@@ -0,0 +1,61 @@
+"""
+Постраничный вывод лент по ключу (created_at, id) — keyset pagination.
+
+Следующая страница начинается строго после последней показанной записи:
+created_at <= X AND (created_at < X OR id < N). Первое условие — диапазон по индексу
+с created_at, поэтому стоимость страницы не зависит от ее номера (в отличие от OFFSET),
+а новые записи, появившиеся между запросами, не сдвигают ленту.
+
+Курсор — непрозрачная для клиента строка вида '<микросекунды от эпохи>_<id>';
+для объединенных лент перед id добавляется вид записи.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+
+PAGE_SIZE = 20
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(created_at, *keys):
+    """Курсор для позиции (created_at, *keys)"""
+    return '_'.join([str((created_at - _EPOCH) // _MICROSECOND)] + [str(key) for key in keys])
+
+
+def decode_cursor(cursor, keys=1):
+    """(created_at, *keys) из курсора или None, если курсор пустой или некорректный"""
+    if not cursor:
+        return None
+    parts = cursor.split('_')
+    if len(parts) != keys + 1:
+        return None
+    try:
+        values = [int(part) for part in parts]
+        return (_EPOCH + values[0] * _MICROSECOND, *values[1:])
+    except (ValueError, OverflowError):
+        return None
+
+
+def before(created_at, pk, field='created_at'):
+    """Условие «строго раньше позиции (created_at, pk)» при сортировке по убыванию"""
+    return Q(**{f'{field}__lte': created_at}) & (Q(**{f'{field}__lt': created_at}) | Q(pk__lt=pk))
+
+
+def keyset_page(queryset, cursor=None, page_size=PAGE_SIZE):
+    """
+    Страница queryset от новых к старым после позиции cursor.
+    Возвращает (записи, курсор следующей страницы или None, если страница последняя).
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+    position = decode_cursor(cursor)
+    if position is not None:
+        queryset = queryset.filter(before(*position))
+
+    # Лишняя запись показывает, есть ли следующая страница, без COUNT(*)
+    items = list(queryset[:page_size + 1])
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, encode_cursor(items[-1].created_at, items[-1].pk)
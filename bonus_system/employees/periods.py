@@ -0,0 +1,112 @@
+"""
+Периоды отчетности: месяц, квартал, год.
+
+Период задается полуоткрытым интервалом [start, end) из datetime с часовым поясом
+проекта (TIME_ZONE), поэтому фильтр created_at__gte/__lt использует индекс по
+created_at, в отличие от created_at__month/__year и created_at__date.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+
+MONTH_NAMES_RU = {
+    1: 'Январь', 2: 'Февраль', 3: 'Март', 4: 'Апрель',
+    5: 'Май', 6: 'Июнь', 7: 'Июль', 8: 'Август',
+    9: 'Сентябрь', 10: 'Октябрь', 11: 'Ноябрь', 12: 'Декабрь'
+}
+
+PERIOD_TYPES = ('month', 'quarter', 'year')
+
+
+class Period(namedtuple('Period', ['type', 'value', 'label', 'start', 'end'])):
+    """Период [start, end) и его представление для фильтров (value) и заголовков (label)"""
+
+    @property
+    def first_month(self):
+        """Первое число первого месяца периода"""
+        return self.start.date()
+
+    @property
+    def last_month(self):
+        """Первое число последнего месяца периода"""
+        return (self.end - timedelta(days=1)).date().replace(day=1)
+
+    def filter_kwargs(self, field='created_at'):
+        """Условия для QuerySet.filter: field__gte=start, field__lt=end"""
+        return {f'{field}__gte': self.start, f'{field}__lt': self.end}
+
+
+def _month_start(year, month):
+    # Переполнение месяца переносим на следующий год (month=13 -> январь)
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def month_period(year, month):
+    return Period(
+        'month',
+        f'{year}-{month:02d}',
+        f'{MONTH_NAMES_RU[month]} {year}',
+        _month_start(year, month),
+        _month_start(year, month + 1),
+    )
+
+
+def quarter_period(year, quarter):
+    start_month = (quarter - 1) * 3 + 1
+    return Period(
+        'quarter',
+        f'{year}-Q{quarter}',
+        f'{quarter} квартал {year}',
+        _month_start(year, start_month),
+        _month_start(year, start_month + 3),
+    )
+
+
+def year_period(year):
+    return Period(
+        'year',
+        str(year),
+        f'{year} год',
+        _month_start(year, 1),
+        _month_start(year + 1, 1),
+    )
+
+
+def current_period(period_type='month'):
+    """Период, в который попадает текущий момент (в TIME_ZONE)"""
+    today = timezone.localdate()
+    if period_type == 'year':
+        return year_period(today.year)
+    if period_type == 'quarter':
+        return quarter_period(today.year, (today.month - 1) // 3 + 1)
+    return month_period(today.year, today.month)
+
+
+def resolve_period(period_type, period_value=None):
+    """
+    Период по параметрам фильтра: month + 'YYYY-MM', quarter + 'YYYY-QN', year + 'YYYY'.
+    Без значения или при некорректном значении — текущий период этого типа.
+    """
+    if period_type not in PERIOD_TYPES:
+        period_type = 'month'
+    if not period_value:
+        return current_period(period_type)
+
+    try:
+        if period_type == 'year':
+            return year_period(int(period_value))
+        if period_type == 'quarter':
+            year, quarter = map(int, period_value.split('-Q'))
+            if not 1 <= quarter <= 4:
+                raise ValueError(period_value)
+            return quarter_period(year, quarter)
+        year, month = map(int, period_value.split('-'))
+        if not 1 <= month <= 12:
+            raise ValueError(period_value)
+        return month_period(year, month)
+    except (ValueError, OverflowError):
+        return current_period(period_type)
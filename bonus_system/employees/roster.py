@@ -0,0 +1,161 @@
+"""
+Справочник сотрудников в компактном JSON для страниц с фильтрацией на клиенте
+(начисление премии, управление сотрудниками).
+
+Версия справочника — метка в общем кэше, которая меняется при любом изменении
+сотрудников, учетных записей, отделов и должностей (employees/signals.py).
+По ней строится ETag: браузер перепроверяет справочник при каждом открытии
+страницы и получает 304 Not Modified, пока справочник не менялся, а сервер
+собирает JSON не чаще одного раза на версию.
+"""
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Func
+
+from .models import Employee, StaffMember, Department, Position
+
+ROSTER_VERSION_KEY = 'roster:version'
+ROSTER_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Колонки строк staff в JSON
+ROSTER_FIELDS = [
+    'id', 'last_name', 'first_name', 'middle_name', 'department_id', 'position_id',
+    'email', 'phone', 'is_active', 'participates_in_bonus', 'profile_id', 'employee_id',
+]
+
+
+# Имя SQL-функции нормализации, которую db.py регистрирует в каждом соединении SQLite
+NAME_FOLD_FUNCTION = 'employees_name_fold'
+
+
+def fold_name(value):
+    """Часть ФИО без пробелов по краям, в нижнем регистре и с е вместо ё"""
+    return (value or '').strip().lower().replace('ё', 'е')
+
+
+def name_key(last_name, first_name, middle_name=''):
+    """Нормализованное ФИО для сопоставления справочника с учетными записями"""
+    return tuple(fold_name(part) for part in (last_name, first_name, middle_name))
+
+
+class NameFold(Func):
+    """fold_name в SQL: в SQLite LOWER меняет регистр только у латиницы, поэтому — функция из db.py"""
+    template = "REPLACE(LOWER(TRIM(%(expressions)s)), 'ё', 'е')"
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template=f'{NAME_FOLD_FUNCTION}(%(expressions)s)', **extra_context)
+
+
+def _name_index(employees):
+    by_full_name = defaultdict(list)
+    by_short_name = defaultdict(list)
+    for employee in employees.only('id', 'last_name', 'first_name', 'middle_name').order_by('id'):
+        key = name_key(employee.last_name, employee.first_name, employee.middle_name)
+        by_full_name[key].append(employee)
+        by_short_name[key[:2]].append(employee)
+    return by_full_name, by_short_name
+
+
+def employee_name_index():
+    """
+    Все учетные записи Employee одним запросом, сгруппированные по нормализованному
+    полному ФИО и по фамилии с именем (в порядке id).
+    """
+    return _name_index(Employee.objects.all())
+
+
+def staff_name_index(staff):
+    """
+    Индекс employee_name_index только из учетных записей с теми же фамилией и именем,
+    что у сотрудника справочника staff: для сопоставления одного человека.
+    """
+    last_name, first_name, _ = name_key(staff.last_name, staff.first_name)
+    return _name_index(Employee.objects.annotate(
+        last_name_key=NameFold('last_name'),
+        first_name_key=NameFold('first_name'),
+    ).filter(last_name_key=last_name, first_name_key=first_name))
+
+
+def match_employee(staff, name_index, exclude_id=None):
+    """
+    Учетная запись для сотрудника справочника без связанного профиля: единственное
+    совпадение по полному ФИО, иначе первая запись с теми же фамилией и именем.
+    """
+    by_full_name, by_short_name = name_index
+    key = name_key(staff.last_name, staff.first_name, staff.middle_name)
+    exact = by_full_name.get(key, [])
+    if len(exact) == 1:
+        return exact[0]
+    for employee in by_short_name.get(key[:2], []):
+        if employee.id != exclude_id:
+            return employee
+    return None
+
+
+def roster_version():
+    """Текущая версия справочника"""
+    version = cache.get(ROSTER_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add: при гонке процессы договариваются об одной метке
+        if not cache.add(ROSTER_VERSION_KEY, version, None):
+            version = cache.get(ROSTER_VERSION_KEY, version)
+    return version
+
+
+def bump_roster_version():
+    cache.set(ROSTER_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _scope(include_inactive):
+    # Уволенных сотрудников видят только администраторы
+    return 'all' if include_inactive else 'active'
+
+
+def roster_etag(request, version=None):
+    """ETag справочника для пользователя запроса"""
+    return f'roster-{version or roster_version()}-{_scope(request.user.is_admin)}'
+
+
+def _build_roster(version, include_inactive):
+    name_index = None
+    rows = []
+    staff_members = StaffMember.objects.all()
+    if not include_inactive:
+        staff_members = staff_members.filter(is_active=True)
+    staff_members = staff_members.order_by('last_name', 'first_name').only(
+        'id', 'last_name', 'first_name', 'middle_name', 'department', 'position',
+        'email', 'phone', 'is_active', 'participates_in_bonus', 'employee_profile',
+    )
+    for staff in staff_members:
+        employee_id = staff.employee_profile_id
+        if employee_id is None:
+            if name_index is None:
+                name_index = employee_name_index()
+            employee = match_employee(staff, name_index)
+            employee_id = employee.id if employee else None
+        rows.append([
+            staff.id, staff.last_name, staff.first_name, staff.middle_name, staff.department_id, staff.position_id,
+            staff.email, staff.phone, staff.is_active, staff.participates_in_bonus, staff.employee_profile_id, employee_id,
+        ])
+
+    return {
+        'version': version,
+        'departments': list(Department.objects.order_by('name').values_list('id', 'name')),
+        'positions': list(Position.objects.order_by('name').values_list('id', 'name')),
+        'fields': ROSTER_FIELDS,
+        'staff': rows,
+    }
+
+
+def roster_payload(include_inactive=False):
+    """JSON-справочник текущей версии (собирается один раз на версию)"""
+    version = roster_version()
+    key = f'roster:payload:{version}:{_scope(include_inactive)}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = _build_roster(version, include_inactive)
+        cache.set(key, payload, ROSTER_CACHE_TIMEOUT)
+    return payload
@@ -0,0 +1,129 @@
+"""
+Полнотекстовый поиск по справочнику сотрудников (StaffMember).
+
+На SQLite используется виртуальная таблица FTS5 employees_staffmember_search
+(rowid = id сотрудника) с нормализованными ФИО, email и телефоном. Нормализация
+приводит текст к нижнему регистру и заменяет ё на е — LIKE в SQLite сравнивает
+без учета регистра только латиницу. Каждое слово запроса ищется по префиксу
+(фрагмент из середины фамилии не находится — это осознанное ограничение FTS5).
+Запрос только из цифр ищется по любой части номера телефона, как и прежний icontains.
+
+Индекс обновляется сигналами (employees/signals.py); после массовых изменений
+в обход save() его пересобирает команда rebuild_staff_search_index.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'employees_staffmember_search'
+
+CREATE_SEARCH_TABLE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} '
+    f"USING fts5(name, email, phone, tokenize = 'unicode61 remove_diacritics 0')"
+)
+DROP_SEARCH_TABLE_SQL = f'DROP TABLE IF EXISTS {SEARCH_TABLE}'
+
+
+def normalize(text):
+    """Нижний регистр и ё -> е"""
+    return (text or '').lower().replace('ё', 'е')
+
+
+def _phone_variants(phone):
+    # Номер индексируется цифрами целиком, без кода страны и с восьмеркой вместо +7
+    digits = re.sub(r'\D', '', phone or '')
+    if not digits:
+        return ''
+    variants = [digits, digits[-10:]]
+    if len(digits) == 11 and digits[0] in '78':
+        variants.append(('8' if digits[0] == '7' else '7') + digits[1:])
+    return ' '.join(dict.fromkeys(variants))
+
+
+def search_document(staff):
+    """Значения колонок индекса (name, email, phone) для сотрудника справочника"""
+    name = ' '.join(filter(None, [staff.last_name, staff.first_name, staff.middle_name]))
+    return normalize(name), normalize(staff.email), _phone_variants(staff.phone)
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def index_staff(staff):
+    """Добавляет или обновляет сотрудника в индексе"""
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [staff.pk])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, email, phone) VALUES (%s, %s, %s, %s)',
+            [staff.pk, *search_document(staff)]
+        )
+
+
+def unindex_staff(staff_id):
+    """Удаляет сотрудника из индекса"""
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [staff_id])
+
+
+def rebuild_index(staff_members, db_connection=None):
+    """Заполняет индекс заново по списку сотрудников; возвращает их количество"""
+    db_connection = db_connection or connection
+    rows = [(staff.pk, *search_document(staff)) for staff in staff_members]
+    with db_connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, email, phone) VALUES (%s, %s, %s, %s)',
+            rows
+        )
+    return len(rows)
+
+
+def match_expression(query):
+    """
+    Запрос FTS5: каждое слово — префикс ("иван"*), слова объединяются по И.
+    Цифры запроса склеиваются в один номер, чтобы '+7 (900) 123' совпало с телефоном.
+    """
+    words = re.findall(r'\w+', normalize(query))
+    terms = [word for word in words if not word.isdigit()]
+    digits = ''.join(word for word in words if word.isdigit())
+    if digits:
+        terms.append(digits)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def phone_fragment(query):
+    """Цифры запроса, если в нем нет букв (поиск по части номера), иначе пустая строка"""
+    if re.search(r'[^\W\d_]', query):
+        return ''
+    return re.sub(r'\D', '', query)
+
+
+def search_staff(queryset, query):
+    """Сотрудники queryset, найденные по ФИО, email или телефону"""
+    expression = match_expression(query)
+    if not expression:
+        return queryset
+    if not search_available():
+        return queryset.filter(
+            Q(first_name__icontains=query) |
+            Q(last_name__icontains=query) |
+            Q(middle_name__icontains=query) |
+            Q(email__icontains=query) |
+            Q(phone__icontains=query)
+        )
+    digits = phone_fragment(query)
+    if digits:
+        # Префикс FTS5 не находит середину номера: колонка phone хранит только цифры, LIKE по ней
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {SEARCH_TABLE} WHERE phone LIKE %s', [f'%{digits}%'])
+        )
+    return queryset.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [expression])
+    )
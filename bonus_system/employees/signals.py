@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from . import celebrations
+from .models import Employee, StaffMember, Holiday, Department, Position, BonusTransfer, RegistryMonthVersion
+from .roster import bump_roster_version
+from .search import index_staff, unindex_staff
+from .thumbnails import schedule_thumbnails
+
+# Поля Employee, от которых зависит календарь событий
+CALENDAR_EMPLOYEE_FIELDS = {'first_name', 'last_name', 'middle_name', 'birth_date', 'department'}
+# Поля Employee, по которым учетная запись сопоставляется со справочником
+ROSTER_EMPLOYEE_FIELDS = {'first_name', 'last_name', 'middle_name'}
+
+
+def _roster_changed():
+    # Новая версия публикуется после фиксации, иначе другой процесс успеет
+    # собрать справочник новой версии из старых данных
+    transaction.on_commit(bump_roster_version)
+
+
+def _calendar_changed():
+    # Как и версия справочника: сброс после фиксации, чтобы календарь не собрали из старых строк
+    transaction.on_commit(celebrations.invalidate)
+
+
+@receiver(post_save, sender=StaffMember)
+def index_staff_member(sender, instance, **kwargs):
+    index_staff(instance)
+    _calendar_changed()
+    _roster_changed()
+
+
+@receiver(post_delete, sender=StaffMember)
+def unindex_staff_member(sender, instance, **kwargs):
+    unindex_staff(instance.pk)
+    _calendar_changed()
+    _roster_changed()
+
+
+@receiver(post_save, sender=Employee)
+def employee_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Частичные сохранения (last_login и т.п.) календарь и справочник не затрагивают
+    if update_fields is None or CALENDAR_EMPLOYEE_FIELDS.intersection(update_fields):
+        _calendar_changed()
+    if created or update_fields is None or ROSTER_EMPLOYEE_FIELDS.intersection(update_fields):
+        _roster_changed()
+
+
+@receiver(post_delete, sender=Employee)
+def employee_deleted(sender, **kwargs):
+    _calendar_changed()
+    _roster_changed()
+
+
+@receiver(pre_delete, sender=Employee)
+def employee_transfers_deleted(sender, instance, **kwargs):
+    # Переводы сотрудника удаляются каскадом вместе с учетной записью: реестры их месяцев
+    # меняются. Отмененные переводы в реестр не входят.
+    months = BonusTransfer.objects.filter(
+        Q(from_employee=instance) | Q(to_employee=instance),
+        is_deleted=False,
+    ).dates('created_at', 'month')
+    RegistryMonthVersion.bump_months(months)
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def holiday_changed(sender, **kwargs):
+    _calendar_changed()
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+def roster_dictionary_changed(sender, **kwargs):
+    _roster_changed()
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=StaffMember)
+def photo_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'photo' not in update_fields:
+        return
+    photo = instance.photo
+    if photo:
+        transaction.on_commit(lambda: schedule_thumbnails(photo))
@@ -0,0 +1,161 @@
+"""
+Статические файлы с хешем в имени, предварительным сжатием и вечным кэшированием.
+
+CompressedManifestStaticFilesStorage при collectstatic дописывает к именам хеш
+содержимого (staticfiles.json) и рядом с текстовыми файлами кладет сжатые
+варианты .gz и, если установлен пакет brotli, .br.
+
+StaticFilesMiddleware отдает файлы из STATIC_ROOT без URLconf и view: выбирает
+сжатый вариант по Accept-Encoding, а файлам с хешем в имени ставит
+Cache-Control immutable на год — повторные загрузки страниц не делают запросов
+за статикой. Список файлов читается один раз, поэтому после collectstatic процесс
+нужно перезапустить. При DEBUG = True middleware отключается: статику из
+STATICFILES_DIRS отдает runserver.
+"""
+import gzip
+import mimetypes
+import os
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico'}
+# Сжатый вариант сохраняется, только если он заметно меньше оригинала
+MIN_COMPRESSION_RATIO = 0.95
+
+# Расширение сжатого варианта по Content-Encoding, в порядке предпочтения
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Файлы без хеша в имени (например, ссылки из сторонних пакетов) могут измениться при обновлении
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+
+
+def compress(path):
+    """Сжатые варианты файла path рядом с ним (.gz, .br)"""
+    with open(path, 'rb') as source:
+        content = source.read()
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(content) * MIN_COMPRESSION_RATIO:
+            with open(path + suffix, 'wb') as output:
+                output.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хешами имен и сжатые варианты текстовых файлов"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not isinstance(processed, Exception):
+                names.add(name)
+                if hashed_name:
+                    names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        # CSS перезаписывается на нескольких проходах: сжимается итоговое содержимое
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                compress(self.path(name))
+
+
+StaticFile = namedtuple('StaticFile', ['path', 'content_type', 'modified_at', 'cache_control', 'encodings'])
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, кроме явно запрещенных (q=0)"""
+    encodings = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        encoding, _, parameters = part.partition(';')
+        name, _, quality = parameters.strip().partition('=')
+        try:
+            allowed = name.strip() != 'q' or float(quality) > 0
+        except ValueError:
+            allowed = True
+        if allowed:
+            encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class StaticFilesMiddleware:
+    """Отдача собранной статики (STATIC_ROOT) до остальных middleware"""
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else '/' + settings.STATIC_URL
+        self.root = os.fspath(settings.STATIC_ROOT)
+        self._files = None
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            static_file = self.files.get(request.path_info[len(self.prefix):])
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    @property
+    def files(self):
+        # Индекс строится при первом запросе статики, а не при каждом: без обращений к диску на запрос
+        if self._files is None:
+            self._files = self.scan()
+        return self._files
+
+    def scan(self):
+        hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        suffixes = {suffix for encoding, suffix in ENCODINGS}
+        files = {}
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if os.path.splitext(filename)[1] in suffixes and os.path.exists(os.path.splitext(path)[0]):
+                    continue
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                content_type, _ = mimetypes.guess_type(filename)
+                files[name] = StaticFile(
+                    path=path,
+                    content_type=content_type or 'application/octet-stream',
+                    modified_at=int(os.stat(path).st_mtime),
+                    cache_control=IMMUTABLE_CACHE_CONTROL if name in hashed_names else DEFAULT_CACHE_CONTROL,
+                    encodings=[
+                        (encoding, path + suffix) for encoding, suffix in ENCODINGS
+                        if os.path.exists(path + suffix)
+                    ],
+                )
+        return files
+
+    def serve(self, request, static_file):
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if if_modified_since and if_modified_since >= static_file.modified_at:
+            response = HttpResponseNotModified()
+        else:
+            path, encoding = static_file.path, None
+            accepted = accepted_encodings(request)
+            for name, compressed_path in static_file.encodings:
+                if name in accepted:
+                    path, encoding = compressed_path, name
+                    break
+            response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            # Имя сжатого варианта не должно попасть в заголовки
+            del response['Content-Disposition']
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(static_file.modified_at)
+        response['Cache-Control'] = static_file.cache_control
+        if static_file.encodings:
+            response['Vary'] = 'Accept-Encoding'
+        return response
@@ -1,8 +1,32 @@
 from django import template
 from ..models import SystemSettings
+from .. import thumbnails
 
 register = template.Library()
 
 @register.simple_tag
 def get_system_settings():
     return SystemSettings.get_settings()
+
+@register.simple_tag
+def system_settings_version():
+    """Версия настроек для ключей кэша фрагментов: {% system_settings_version as version %}"""
+    return SystemSettings.get_version()
+
+@register.filter
+def ru_plural(number, forms):
+    """Число со словом в нужной форме: {{ 5|ru_plural:"год,года,лет" }} -> '5 лет'"""
+    one, few, many = forms.split(',')
+    number = int(number)
+    if number % 10 == 1 and number % 100 != 11:
+        form = one
+    elif 2 <= number % 10 <= 4 and not 12 <= number % 100 <= 14:
+        form = few
+    else:
+        form = many
+    return f'{number} {form}'
+
+@register.simple_tag
+def thumbnail_url(photo, size=256):
+    """URL миниатюры фото не меньше size пикселей: {% thumbnail_url staff.photo 100 %}"""
+    return thumbnails.thumbnail_url(photo, size)
@@ -1,3 +1,1298 @@
-from django.test import TestCase
+"""
+Тесты приложения employees.
 
-# Create your tests here.
+Бюджеты запросов к базе для всех страниц приложения (QueryBudgetTests): тест заполняет базу реалистичным набором данных (отделы, справочник, учетные
+записи, переводы за год с лишним, уведомления, новости) и открывает каждый URL
+из employees/urls.py обычным пользователем и администратором. Для каждой
+страницы проверяется число SQL-запросов и число строк, которые они вернули.
+При превышении бюджета тест падает со списком запросов и местом в коде,
+откуда каждый из них был выполнен.
+
+Кэш в тестах локальный и очищается перед каждой страницей, поэтому бюджеты
+рассчитаны на первое (самое дорогое) открытие.
+
+Остальные тесты проверяют сервисы, на которые опираются страницы:
+- проведение переводов (transfers.py) и помесячные итоги для рейтинга (MonthlyBonusSummary);
+- ежемесячный сброс баланса (Employee.reset_all_monthly_balances);
+- задания на выгрузку реестра и их версии (exports.py, run_export_worker);
+- постраничный вывод лент по курсору (pagination.py, notifications.py);
+- общие уведомления, отметку прочтения и счетчик непрочитанных (notifications.py);
+- периоды отчетности и их границы в TIME_ZONE (periods.py);
+- окно рейтинга на оконных функциях и кэш рейтинга (leaderboard.py);
+- сопоставление справочника с учетными записями по ФИО, версию и ETag справочника (roster.py);
+- поиск по справочнику (search.py, миграция 0011);
+- календарь событий и его суточный индекс (celebrations.py);
+- кэш настроек системы в памяти процесса (SystemSettings.get_settings).
+"""
+import random
+import tempfile
+import traceback
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import FileResponse
+from django.test import TestCase, override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import celebrations, urls as employees_urls
+from .models import (
+    Employee, Department, Position, StaffMember, BonusTransfer, Notification,
+    BroadcastNotification, News, Holiday, MonthlyBonusSummary, RegistryMonthVersion, SystemSettings, ExportJob,
+)
+from .leaderboard import CURRENT_PERIOD_TIMEOUT, data_version, leaderboard, rank_window, rating_queryset
+from .notifications import broadcast, mark_all_read, notifications_page, unread_count
+from .pagination import encode_cursor, decode_cursor, keyset_page
+from .periods import current_period, month_period, resolve_period, year_period
+from .roster import employee_name_index, match_employee, roster_version, staff_name_index
+from .search import SEARCH_TABLE, rebuild_index, search_available, search_staff
+from .transfers import cancel_transfer, transfer_bonus, TransferError
+
+# Бюджет по умолчанию: (запросов, строк)
+DEFAULT_BUDGET = (10, 60)
+
+# Страницы, которым по объему данных нужно больше
+BUDGETS = {
+    'home': (20, 280),                       # рейтинг месяца и календарь событий на холодном кэше
+    'employees_list': (12, 100),
+    'reviews_list': (10, 130),               # фильтр по сотрудникам: все учетные записи
+    'bonus_transfer': (12, 125),
+    'profile': (14, 70),
+    'upcoming_events': (6, 220),             # индекс календаря по всему справочнику
+    'roster': (7, 250),                      # весь справочник одним JSON
+    'notifications': (10, 85),
+    'admin_panel': (12, 40),
+    'admin_staff_edit': (13, 45),
+    'admin_user_delete': (23, 10),           # каскадное удаление связанных записей и версии реестров их месяцев
+    'admin_transfer_delete': (12, 40),
+    'admin_bonus_participation': (10, 110),  # список всех учетных записей
+    'admin_manage_admins': (10, 110),
+    'admin_export_transfers': (12, 40),
+}
+
+# Служебные команды транзакций не считаются запросами к данным
+SERVICE_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+PROJECT_DIR = str(Path(settings.BASE_DIR))
+
+LAST_NAMES = ['Иванов', 'Петров', 'Сидоров', 'Кузнецов', 'Смирнов', 'Попов', 'Волков', 'Соколов', 'Лебедев', 'Козлов']
+FIRST_NAMES = ['Алексей', 'Борис', 'Виктор', 'Григорий', 'Дмитрий', 'Евгений', 'Олег', 'Павел', 'Роман', 'Сергей']
+MIDDLE_NAMES = ['Алексеевич', 'Иванович', 'Петрович', 'Сергеевич', 'Юрьевич']
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Манифест статики появляется только после collectstatic
+PAGE_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def create_employee(number, **fields):
+    """Учетная запись сотрудника с уникальными email и телефоном"""
+    values = {
+        'username': f'employee{number}@example.com',
+        'email': f'employee{number}@example.com',
+        'phone': f'+7920{number:07d}',
+        'last_name': LAST_NAMES[number % 10],
+        'first_name': FIRST_NAMES[number // 10 % 10],
+        'middle_name': MIDDLE_NAMES[number % 5],
+        'password': '!',
+    }
+    values.update(fields)
+    return Employee.objects.create(**values)
+
+
+class QueryRecorder:
+    """Запоминает SQL-запросы соединения и стек вызова каждого из них"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if not sql.lstrip().upper().startswith(SERVICE_STATEMENTS):
+            cursor = context['cursor']
+            self.queries.append({
+                'sql': connection.ops.last_executed_query(cursor, sql, params),
+                'stack': self._project_stack(),
+                'rows': 0,
+            })
+        return result
+
+    @staticmethod
+    def _project_stack():
+        # Только кадры проекта: view, шаблонные теги, модули employees
+        return [
+            f'{frame.filename}:{frame.lineno} in {frame.name}'
+            for frame in traceback.extract_stack()[:-2]
+            if frame.filename.startswith(PROJECT_DIR) and not frame.filename.endswith(('tests.py', 'manage.py'))
+        ]
+
+    def count_rows(self):
+        """Число строк каждого SELECT (запросы повторяются после ответа в той же транзакции)"""
+        with connection.cursor() as cursor:
+            for query in self.queries:
+                if query['sql'].lstrip().upper().startswith(('SELECT', 'WITH')):
+                    cursor.execute(f'SELECT COUNT(*) FROM ({query["sql"]}) budget_rows')
+                    query['rows'] = cursor.fetchone()[0]
+
+    @property
+    def total_rows(self):
+        return sum(query['rows'] for query in self.queries)
+
+    def report(self):
+        lines = []
+        for number, query in enumerate(self.queries, 1):
+            lines.append(f'{number}. [{query["rows"]} строк] {query["sql"]}')
+            lines.extend(f'      {frame}' for frame in query['stack'])
+        return '\n'.join(lines)
+
+
+@override_settings(
+    CACHES=LOCAL_CACHE,
+    # Все запросы идут через default: так их видит счетчик и данные теста
+    DATABASE_READ_ALIAS=None,
+    MEDIA_ROOT=tempfile.mkdtemp(prefix='bonus-system-tests-'),
+    STORAGES=PAGE_STORAGES,
+)
+class QueryBudgetTests(TestCase):
+    """Все страницы employees/urls.py укладываются в бюджет запросов и строк"""
+
+    @classmethod
+    def setUpTestData(cls):
+        rnd = random.Random(2024)
+        now = timezone.now()
+
+        departments = Department.objects.bulk_create(
+            Department(name=name) for name in ['Бухгалтерия', 'Разработка', 'Продажи', 'Поддержка', 'Маркетинг']
+        )
+        positions = Position.objects.bulk_create(
+            Position(name=f'{name} ({department.name})', department=department)
+            for department in departments
+            for name in ['Специалист', 'Ведущий специалист', 'Руководитель']
+        )
+
+        employees = []
+        for number in range(60):
+            position = positions[number % len(positions)]
+            employees.append(Employee(
+                username=f'user{number}',
+                email=f'user{number}@example.com',
+                phone=f'+7900{number:07d}',
+                last_name=LAST_NAMES[number % 10],
+                first_name=FIRST_NAMES[number // 10 % 10],
+                middle_name=MIDDLE_NAMES[number % 5],
+                birth_date=date(1980 + number % 20, number % 12 + 1, number % 28 + 1),
+                department=position.department,
+                position=position,
+                is_admin=number < 3,
+                participates_in_bonus=number % 15 != 0,
+                password='!',
+            ))
+        employees = Employee.objects.bulk_create(employees)
+        cls.admin = employees[0]
+        cls.user = employees[10]
+
+        staff_members = []
+        for number in range(120):
+            position = positions[number % len(positions)]
+            staff_members.append(StaffMember(
+                last_name=LAST_NAMES[number % 10],
+                first_name=FIRST_NAMES[number // 10 % 10],
+                middle_name=MIDDLE_NAMES[number % 5],
+                email=f'staff{number}@example.com',
+                phone=f'+7910{number:07d}',
+                birth_date=date(1975 + number % 25, number % 12 + 1, number % 28 + 1),
+                office_start_date=date(2015 + number % 8, (number + 5) % 12 + 1, number % 28 + 1),
+                department=position.department,
+                position=position,
+                is_active=number % 12 != 0,
+                employee_profile=employees[number] if number < len(employees) else None,
+            ))
+        staff_members = StaffMember.objects.bulk_create(staff_members)
+        if search_available():
+            rebuild_index(staff_members)
+
+        # Переводы за 14 месяцев; created_at задается после вставки (auto_now_add)
+        transfers = BonusTransfer.objects.bulk_create(
+            BonusTransfer(
+                from_employee=rnd.choice(employees),
+                to_employee=rnd.choice(employees),
+                amount=Decimal(rnd.choice([50, 100, 150, 200, 300])),
+                reason=rnd.choice(BonusTransfer.REASON_CHOICES)[0],
+                review=f'Спасибо за помощь с задачей №{number}',
+            )
+            for number in range(700)
+        )
+        for number, transfer in enumerate(transfers):
+            transfer.created_at = now - timedelta(days=number * 430 / len(transfers), minutes=number)
+            transfer.is_deleted = number % 40 == 0
+        BonusTransfer.objects.bulk_update(transfers, ['created_at', 'is_deleted'], batch_size=200)
+        cls.transfer = transfers[1]
+
+        SystemSettings.get_settings()
+        MonthlyBonusSummary.rebuild()
+        months = {MonthlyBonusSummary.month_of(transfer.created_at) for transfer in transfers}
+        RegistryMonthVersion.objects.bulk_create(RegistryMonthVersion(month=month, version=1) for month in months)
+
+        for employee in (cls.user, cls.admin):
+            notifications = Notification.objects.bulk_create(
+                Notification(user=employee, type='transfer_received', title='Получен перевод',
+                             message=f'Вам перевели {number * 10} руб.', is_read=number >= 5)
+                for number in range(80)
+            )
+            for number, notification in enumerate(notifications):
+                notification.created_at = now - timedelta(hours=number * 7)
+            Notification.objects.bulk_update(notifications, ['created_at'])
+            Employee.objects.filter(pk=employee.pk).update(unread_notifications_count=5)
+
+        broadcasts = BroadcastNotification.objects.bulk_create(
+            BroadcastNotification(title=f'Новость {number}', message='Текст новости') for number in range(20)
+        )
+        Employee.objects.update(last_seen_broadcast_id=broadcasts[-3].id)
+        News.objects.bulk_create(
+            News(title=f'Новость {number}', content='Текст новости ' * 20, author=cls.admin) for number in range(15)
+        )
+        today = timezone.localdate()
+        Holiday.objects.bulk_create([
+            Holiday(name='Новый год', date=date(2000, 1, 1)),
+            Holiday(name='День защитника Отечества', date=date(2000, 2, 23)),
+            Holiday(name='Международный женский день', date=date(2000, 3, 8)),
+            Holiday(name='Праздник сегодня', date=today.replace(year=2000) if (today.month, today.day) != (2, 29) else date(2000, 2, 28)),
+        ])
+
+    def url_cases(self):
+        """Аргументы и параметры запроса для каждого имени URL"""
+        return {
+            'admin_staff_edit': {'kwargs': {'staff_id': StaffMember.objects.order_by('id').values_list('id', flat=True)[5]}},
+            'admin_staff_delete': {'kwargs': {'staff_id': StaffMember.objects.order_by('-id').values_list('id', flat=True)[0]}},
+            'admin_user_delete': {'kwargs': {'employee_id': Employee.objects.order_by('-id').values_list('id', flat=True)[0]}},
+            'admin_transfer_delete': {'kwargs': {'transfer_id': self.transfer.id}},
+            'get_positions_by_department': {'query': {'department_id': Department.objects.values_list('id', flat=True)[0]}},
+            'employees_list': {'query': {'search': 'иван'}},
+            'rating': {'query': {'period': 'quarter'}},
+            'leaderboard_api': {'query': {'period': 'year', 'top': 10, 'neighbours': 2}},
+            'upcoming_events': {'query': {'days': 30}},
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, user, url):
+        """Открывает url от имени user; изменения в базе откатываются"""
+        self.client.force_login(user)
+        recorder = QueryRecorder()
+        with transaction.atomic():
+            with connection.execute_wrapper(recorder):
+                response = self.client.get(url)
+            recorder.count_rows()
+            transaction.set_rollback(True)
+        cache.clear()
+        return response, recorder
+
+    def test_every_url_within_budget(self):
+        cases = self.url_cases()
+        for pattern in employees_urls.urlpatterns:
+            self.assertIsInstance(pattern, URLPattern)
+            case = cases.get(pattern.name, {})
+            url = reverse(pattern.name, kwargs=case.get('kwargs'))
+            if case.get('query'):
+                url += '?' + '&'.join(f'{key}={value}' for key, value in case['query'].items())
+            max_queries, max_rows = BUDGETS.get(pattern.name, DEFAULT_BUDGET)
+
+            for role, user in (('пользователь', self.user), ('администратор', self.admin)):
+                with self.subTest(url=pattern.name, role=role):
+                    response, recorder = self.render(user, url)
+                    self.assertLess(response.status_code, 500)
+                    self.assertLessEqual(
+                        len(recorder.queries), max_queries,
+                        f'{url} ({role}): {len(recorder.queries)} запросов при бюджете {max_queries}\n'
+                        f'{recorder.report()}'
+                    )
+                    self.assertLessEqual(
+                        recorder.total_rows, max_rows,
+                        f'{url} ({role}): {recorder.total_rows} строк при бюджете {max_rows}\n'
+                        f'{recorder.report()}'
+                    )
+
+    def test_parametrized_urls_have_cases(self):
+        cases = self.url_cases()
+        for pattern in employees_urls.urlpatterns:
+            if pattern.pattern.converters:
+                self.assertIn(pattern.name, cases, f'Нет аргументов для URL {pattern.name}')
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class TransferServiceTests(TestCase):
+    """transfer_bonus: списание по условию баланса, записи перевода, итогов и уведомления"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = create_employee(1, monthly_bonus_balance=Decimal('500'))
+        cls.receiver = create_employee(2)
+
+    def setUp(self):
+        cache.clear()
+
+    def transfer(self, amount, from_employee=None, to_employee=None):
+        transfer = BonusTransfer(amount=Decimal(amount), reason='teamwork', review='Спасибо за помощь')
+        return transfer_bonus(transfer, from_employee or self.sender, to_employee or self.receiver)
+
+    def assertNothingRecorded(self):
+        self.assertEqual(Employee.objects.get(pk=self.sender.pk).monthly_bonus_balance, Decimal('500'))
+        self.assertEqual(Employee.objects.get(pk=self.receiver.pk).received_bonus_balance, Decimal('0'))
+        self.assertFalse(BonusTransfer.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(MonthlyBonusSummary.objects.filter(total_amount__gt=0).exists())
+
+    def test_transfer_moves_balance_and_records_rows(self):
+        transfer = self.transfer('200')
+
+        self.assertEqual(self.sender.monthly_bonus_balance, Decimal('300'))
+        self.assertEqual(Employee.objects.get(pk=self.sender.pk).monthly_bonus_balance, Decimal('300'))
+        receiver = Employee.objects.get(pk=self.receiver.pk)
+        self.assertEqual(receiver.received_bonus_balance, Decimal('200'))
+        self.assertEqual(receiver.unread_notifications_count, 1)
+        self.assertEqual(receiver.notifications_version, self.receiver.notifications_version + 1)
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user_id, self.receiver.pk)
+        self.assertEqual(notification.type, 'transfer_received')
+        self.assertEqual(notification.related_transfer_id, transfer.pk)
+        self.assertFalse(notification.is_read)
+
+        month = MonthlyBonusSummary.month_of(transfer.created_at)
+        summary = MonthlyBonusSummary.objects.get(employee=self.receiver, month=month)
+        self.assertEqual((summary.total_amount, summary.transfers_count), (Decimal('200'), 1))
+        self.assertEqual(RegistryMonthVersion.objects.get(month=month).version, 1)
+
+    def test_insufficient_funds_rejected(self):
+        with self.assertRaisesMessage(TransferError, 'Недостаточно средств'):
+            self.transfer('500.01')
+        self.assertNothingRecorded()
+
+    def test_balance_checked_in_database_not_in_memory(self):
+        # Второй запрос со старой копией отправителя не уводит баланс в минус
+        stale_sender = Employee.objects.get(pk=self.sender.pk)
+        self.transfer('300')
+        with self.assertRaisesMessage(TransferError, 'Недостаточно средств'):
+            self.transfer('300', from_employee=stale_sender)
+        self.assertEqual(Employee.objects.get(pk=self.sender.pk).monthly_bonus_balance, Decimal('200'))
+        self.assertEqual(BonusTransfer.objects.count(), 1)
+
+    def test_invalid_transfers_rejected(self):
+        outsider = create_employee(3, participates_in_bonus=False)
+        cases = [
+            ('0', self.receiver, 'Сумма перевода должна быть больше нуля'),
+            ('100', self.sender, 'Нельзя переводить деньги самому себе!'),
+            ('100', outsider, 'Этот сотрудник не участвует в системе премирования'),
+        ]
+        for amount, to_employee, message in cases:
+            with self.subTest(message=message):
+                with self.assertRaisesMessage(TransferError, message):
+                    self.transfer(amount, to_employee=to_employee)
+                self.assertNothingRecorded()
+
+    def test_failure_rolls_back_debit(self):
+        # Ошибка после списания откатывает всю транзакцию перевода
+        with mock.patch.object(MonthlyBonusSummary, 'apply_transfer', side_effect=RuntimeError('сбой')):
+            with self.assertRaises(RuntimeError):
+                self.transfer('200')
+        self.assertNothingRecorded()
+        self.assertFalse(RegistryMonthVersion.objects.exists())
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class KeysetPaginationTests(TestCase):
+    """Ленты по курсору: без пропусков и повторов при одинаковом created_at, некорректный курсор — первая страница"""
+
+    PAGE_SIZE = 4
+    GARBAGE_CURSORS = ['garbage', '123', '1_2_3_4', 'a_b_c', '1.5_1_1', '9' * 30 + '_1_1', '_1_']
+
+    @classmethod
+    def setUpTestData(cls):
+        moment = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        cls.user = create_employee(1, date_joined=moment - timedelta(days=30))
+        author = create_employee(2)
+
+        # Большая часть записей обоих видов — с одним и тем же created_at
+        personal = Notification.objects.bulk_create(
+            Notification(user=cls.user, type='transfer_received', title=f'Перевод {number}', message='m')
+            for number in range(9)
+        )
+        broadcasts = BroadcastNotification.objects.bulk_create(
+            BroadcastNotification(title=f'Новость {number}', message='m', author=author) for number in range(7)
+        )
+        for number, item in enumerate(personal + broadcasts):
+            item.created_at = moment + timedelta(hours=1) if number % 5 == 4 else moment
+        Notification.objects.bulk_update(personal, ['created_at'])
+        BroadcastNotification.objects.bulk_update(broadcasts, ['created_at'])
+        cls.expected = {('personal', item.pk) for item in personal} | {('broadcast', item.pk) for item in broadcasts}
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def feed_key(item):
+        return ('broadcast' if isinstance(item, BroadcastNotification) else 'personal', item.pk)
+
+    def walk_notifications(self):
+        pages, cursor = [], None
+        while True:
+            items, cursor = notifications_page(self.user, cursor, page_size=self.PAGE_SIZE)
+            pages.append(items)
+            if cursor is None:
+                return pages
+            self.assertLess(len(pages), 10, 'Лента не заканчивается')
+
+    def test_merged_feed_has_no_gaps_or_duplicates(self):
+        pages = self.walk_notifications()
+        keys = [self.feed_key(item) for page in pages for item in page]
+        self.assertEqual(len(keys), len(set(keys)), 'Повторы в ленте')
+        self.assertEqual(set(keys), self.expected)
+        self.assertTrue(all(len(page) == self.PAGE_SIZE for page in pages[:-1]))
+        timestamps = [item.created_at for page in pages for item in page]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+
+    def test_single_feed_has_no_gaps_or_duplicates(self):
+        queryset = Notification.objects.filter(user=self.user)
+        ids, cursor = [], None
+        while True:
+            items, cursor = keyset_page(queryset, cursor, page_size=self.PAGE_SIZE)
+            ids.extend(item.pk for item in items)
+            if cursor is None:
+                break
+        self.assertEqual(ids, list(queryset.order_by('-created_at', '-id').values_list('pk', flat=True)))
+
+    def test_cursor_round_trip(self):
+        moment = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(moment, 42)), (moment, 42))
+        self.assertEqual(decode_cursor(encode_cursor(moment, 1, 42), keys=2), (moment, 1, 42))
+
+    def test_garbage_cursor_returns_first_page(self):
+        first_page, first_cursor = notifications_page(self.user, page_size=self.PAGE_SIZE)
+        queryset = Notification.objects.filter(user=self.user)
+        first_single = keyset_page(queryset, page_size=self.PAGE_SIZE)
+        for cursor in self.GARBAGE_CURSORS:
+            with self.subTest(cursor=cursor):
+                items, next_cursor = notifications_page(self.user, cursor, page_size=self.PAGE_SIZE)
+                self.assertEqual([self.feed_key(item) for item in items], [self.feed_key(item) for item in first_page])
+                self.assertEqual(next_cursor, first_cursor)
+                self.assertEqual(keyset_page(queryset, cursor, page_size=self.PAGE_SIZE), first_single)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class RankWindowTests(TestCase):
+    """rank_window: места с равными суммами, сотрудник вне рейтинга и сверка с ORM-агрегацией"""
+
+    # Суммы за месяц по номерам сотрудников; 1 и 2, 4 и 5 делят места
+    TOTALS = {1: 300, 2: 300, 3: 200, 4: 100, 5: 100, 6: 50}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.period = current_period('month')
+        month = cls.period.first_month
+        previous_month = (month - timedelta(days=1)).replace(day=1)
+        cls.employees = {number: create_employee(number) for number in range(1, 10)}
+        summaries = [
+            MonthlyBonusSummary(employee=cls.employees[number], month=month, total_amount=total, transfers_count=1)
+            for number, total in cls.TOTALS.items()
+        ]
+        summaries += [
+            # Не участвует в премировании
+            MonthlyBonusSummary(employee=cls.employees[7], month=month, total_amount=1000, transfers_count=2),
+            # Все переводы месяца отменены
+            MonthlyBonusSummary(employee=cls.employees[8], month=month, total_amount=0, transfers_count=0),
+            # Переводы только за прошлый месяц
+            MonthlyBonusSummary(employee=cls.employees[9], month=previous_month, total_amount=500, transfers_count=1),
+        ]
+        MonthlyBonusSummary.objects.bulk_create(summaries)
+        Employee.objects.filter(pk=cls.employees[7].pk).update(participates_in_bonus=False)
+
+    def ids(self, rows):
+        return [row.employee_id for row in rows]
+
+    def test_ties_share_rank(self):
+        window = rank_window(self.period, self.employees[5], top=2, neighbours=1)
+        self.assertEqual(window['participants'], 6)
+        self.assertEqual([(row.rank, row.position) for row in window['top']], [(1, 1), (1, 2)])
+        self.assertEqual(self.ids(window['top']), [self.employees[1].pk, self.employees[2].pk])
+
+        me = window['me']
+        self.assertEqual((me.employee_id, me.rank, me.position, me.total_received), (self.employees[5].pk, 4, 5, Decimal('100')))
+        # Соседи по порядковому номеру; у равных сумм одно место, порядок — по id
+        self.assertEqual([(row.rank, row.position) for row in window['around']], [(4, 4), (4, 5), (6, 6)])
+        self.assertEqual(self.ids(window['around']), [self.employees[number].pk for number in (4, 5, 6)])
+
+    def test_employee_missing_from_ranking(self):
+        for number in (7, 8, 9):
+            with self.subTest(employee=number):
+                window = rank_window(self.period, self.employees[number], top=3, neighbours=2)
+                self.assertIsNone(window['me'])
+                self.assertEqual(window['around'], [])
+                self.assertEqual(self.ids(window['top']), [self.employees[leader].pk for leader in (1, 2, 3)])
+                self.assertEqual(window['participants'], 6)
+
+    def test_matches_orm_aggregation(self):
+        expected = [(employee.pk, employee.total_received) for employee in rating_queryset(self.period)]
+        window = rank_window(self.period, self.employees[1], top=len(expected) + 5)
+        rows = window['top']
+        self.assertEqual(window['participants'], len(expected))
+        self.assertEqual(
+            sorted((row.employee_id, row.total_received) for row in rows),
+            sorted(expected),
+        )
+        totals = [total for _, total in expected]
+        for row in rows:
+            # RANK(): 1 + число сумм строго больше
+            self.assertEqual(row.rank, 1 + sum(total > row.total_received for total in totals))
+        self.assertEqual([row.position for row in rows], list(range(1, len(rows) + 1)))
+
+
+@override_settings(CACHES=LOCAL_CACHE, DATABASE_READ_ALIAS=None, STORAGES=PAGE_STORAGES)
+class StaffMatchingTests(TestCase):
+    """Учетная запись для сотрудника справочника без профиля: ФИО без учета регистра и ё"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = create_employee(1)
+        cls.account = create_employee(2, last_name='СЕМЕНОВ', first_name='петр', middle_name='Алексеевич')
+        create_employee(3, last_name='Семенов', first_name='Павел')
+        cls.staff = StaffMember.objects.create(last_name='Семёнов ', first_name='Пётр', middle_name='алексеевич')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_staff_name_index_holds_only_candidates(self):
+        by_full_name, by_short_name = staff_name_index(self.staff)
+        self.assertEqual([employee.pk for employees in by_short_name.values() for employee in employees], [self.account.pk])
+        self.assertEqual(match_employee(self.staff, (by_full_name, by_short_name)), self.account)
+        self.assertEqual(match_employee(self.staff, employee_name_index()), self.account)
+
+    def test_transfer_by_staff_id_uses_matched_account(self):
+        self.client.force_login(self.sender)
+        response = self.client.get(reverse('bonus_transfer'), {'staff_id': self.staff.pk})
+        self.assertEqual(response.context['form']['to_employee'].initial, self.account.pk)
+
+        employees_before = Employee.objects.count()
+        self.client.post(reverse('bonus_transfer'), {
+            'staff_id': self.staff.pk, 'amount': '100', 'reason': 'teamwork', 'explanation': 'Спасибо',
+        })
+        self.assertEqual(Employee.objects.count(), employees_before)
+        self.assertEqual(BonusTransfer.objects.get().to_employee_id, self.account.pk)
+
+
+@skipUnless(search_available(), 'Полнотекстовый индекс есть только в SQLite')
+class StaffSearchTests(TestCase):
+    """search_staff по индексу FTS5: регистр кириллицы, ё, префиксы, фрагменты телефона и синхронизация индекса"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ivanov = StaffMember.objects.create(
+            last_name='Иванов', first_name='Алёна', middle_name='Петровна',
+            email='A.Ivanova@Example.com', phone='+7 (910) 123-45-67',
+        )
+        cls.semenov = StaffMember.objects.create(last_name='Семёнов', first_name='Олег', phone='8 912 765 43 21')
+        cls.kuznetsov = StaffMember.objects.create(last_name='Кузнецов', first_name='Борис')
+
+    def search(self, query):
+        return set(search_staff(StaffMember.objects.all(), query).values_list('pk', flat=True))
+
+    def assertFound(self, query, *staff_members):
+        self.assertEqual(self.search(query), {staff.pk for staff in staff_members}, query)
+
+    def index_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid, name, email, phone FROM {SEARCH_TABLE} ORDER BY rowid')
+            return cursor.fetchall()
+
+    def test_cyrillic_case_insensitive(self):
+        self.assertFound('ИВАНОВ', self.ivanov)
+        self.assertFound('иВаНоВ алёна', self.ivanov)
+        self.assertFound('a.ivanova@example.com', self.ivanov)
+
+    def test_yo_folded_both_ways(self):
+        self.assertFound('Алена', self.ivanov)
+        self.assertFound('семенов', self.semenov)
+        self.assertFound('СЕМЁНОВ', self.semenov)
+
+    def test_prefix_match(self):
+        self.assertFound('Кузн', self.kuznetsov)
+        self.assertFound('ив ал', self.ivanov)
+        # Фрагмент из середины слова не ищется (ограничение FTS5)
+        self.assertFound('знецов')
+        self.assertFound('иванов олег')
+
+    def test_phone_fragment_match(self):
+        self.assertFound('123-45', self.ivanov)
+        self.assertFound('4567', self.ivanov)
+        self.assertFound('8 910 123 45 67', self.ivanov)
+        self.assertFound('+7 912 765', self.semenov)
+        self.assertFound('999')
+
+    def test_index_follows_save_and_delete(self):
+        self.kuznetsov.last_name = 'Лебедев'
+        self.kuznetsov.save()
+        self.assertFound('кузнецов')
+        self.assertFound('лебедев', self.kuznetsov)
+
+        staff = StaffMember.objects.create(last_name='Козлов', first_name='Роман')
+        self.assertFound('козлов', staff)
+        staff_id = staff.pk
+        staff.delete()
+        self.assertFound('козлов')
+        self.assertNotIn(staff_id, [row[0] for row in self.index_rows()])
+
+    def test_migration_fills_index_like_rebuild(self):
+        rebuild_index(StaffMember.objects.order_by('pk'))
+        expected = self.index_rows()
+        self.assertEqual(len(expected), 3)
+
+        migration = import_module('employees.migrations.0011_staffmember_search')
+        with connection.cursor() as cursor:
+            # Редактор схемы SQLite недоступен внутри транзакции теста: хватает connection и execute
+            schema_editor = SimpleNamespace(connection=connection, execute=cursor.execute)
+            migration.drop_search_table(django_apps, schema_editor)
+            migration.create_search_table(django_apps, schema_editor)
+        self.assertEqual(self.index_rows(), expected)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class LeaderboardCacheTests(TestCase):
+    """leaderboard: новый ключ кэша после перевода и отмены, срок хранения закрытых и текущего периодов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_employee(1, is_admin=True)
+        cls.sender = create_employee(2)
+        cls.first = create_employee(3)
+        cls.second = create_employee(4)
+
+    def setUp(self):
+        cache.clear()
+        self.period = current_period('month')
+
+    def transfer(self, amount, to_employee):
+        transfer = BonusTransfer(amount=Decimal(amount), reason='teamwork', review='Спасибо')
+        return transfer_bonus(transfer, self.sender, to_employee)
+
+    def ranking(self):
+        return [(row.employee_id, row.total_received) for row in leaderboard(self.period)]
+
+    def test_transfer_and_cancel_change_key_and_ranking(self):
+        self.transfer('100', self.first)
+        version = data_version(self.period)
+        self.assertEqual(self.ranking(), [(self.first.pk, Decimal('100'))])
+
+        transfer = self.transfer('300', self.second)
+        self.assertNotEqual(data_version(self.period), version)
+        self.assertEqual(self.ranking(), [(self.second.pk, Decimal('300')), (self.first.pk, Decimal('100'))])
+
+        version = data_version(self.period)
+        cancel_transfer(transfer, self.admin)
+        self.assertNotEqual(data_version(self.period), version)
+        self.assertEqual(self.ranking(), [(self.first.pk, Decimal('100'))])
+
+    def test_cached_until_data_changes(self):
+        self.transfer('100', self.first)
+        self.ranking()
+        with self.assertNumQueries(1):
+            # Только версия месяцев периода
+            self.assertEqual(self.ranking(), [(self.first.pk, Decimal('100'))])
+
+    def test_closed_period_cached_without_expiry(self):
+        cases = [
+            (month_period(2020, 1), None),
+            (year_period(2020), None),
+            (current_period('month'), CURRENT_PERIOD_TIMEOUT),
+            (current_period('year'), CURRENT_PERIOD_TIMEOUT),
+        ]
+        for period, timeout in cases:
+            with self.subTest(period=period.value):
+                with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+                    leaderboard(period)
+                cache_set.assert_called_once()
+                self.assertEqual(cache_set.call_args.args[2], timeout)
+
+
+@override_settings(CACHES=LOCAL_CACHE, DATABASE_READ_ALIAS=None)
+class RosterVersionTests(TestCase):
+    """Справочник: 304 по If-None-Match и новая версия после изменения сотрудников, учетных записей и отделов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_employee(1)
+        cls.department = Department.objects.create(name='Бухгалтерия')
+        cls.staff = StaffMember.objects.create(last_name='Волков', first_name='Олег', department=cls.department)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get_roster(self, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(reverse('roster'), headers=headers)
+
+    def assertVersionBumped(self, change):
+        version = roster_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+            # Новая версия публикуется только после фиксации транзакции
+            self.assertEqual(roster_version(), version)
+        self.assertNotEqual(roster_version(), version)
+
+    def test_matching_etag_returns_not_modified(self):
+        response = self.get_roster()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(response.json()['staff'][0][0], self.staff.pk)
+
+        response = self.get_roster(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.assertEqual(self.get_roster('"roster-stale-active"').status_code, 200)
+
+    def test_changes_bump_version(self):
+        changes = {
+            'staff saved': lambda: StaffMember.objects.filter(pk=self.staff.pk).get().save(),
+            'staff created': lambda: StaffMember.objects.create(last_name='Попов', first_name='Борис'),
+            'staff deleted': lambda: StaffMember.objects.filter(last_name='Попов').get().delete(),
+            'employee created': lambda: create_employee(2),
+            'employee renamed': lambda: Employee.objects.get(pk=self.user.pk).save(update_fields=['last_name']),
+            'employee deleted': lambda: Employee.objects.get(username='employee2@example.com').delete(),
+            'department renamed': lambda: Department.objects.filter(pk=self.department.pk).get().save(),
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                self.assertVersionBumped(change)
+
+    def test_new_version_invalidates_etag(self):
+        etag = self.get_roster()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            StaffMember.objects.create(last_name='Лебедев', first_name='Роман')
+        response = self.get_roster(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['staff']), 2)
+
+    def test_login_does_not_bump_version(self):
+        version = roster_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.get(pk=self.user.pk).save(update_fields=['last_login'])
+        self.assertEqual(roster_version(), version)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class SystemSettingsCacheTests(TestCase):
+    """SystemSettings.get_settings: копия в памяти процесса, перечитывается только после смены версии"""
+
+    def setUp(self):
+        cache.clear()
+        SystemSettings._process_cache = None
+        self.addCleanup(setattr, SystemSettings, '_process_cache', None)
+
+    def test_steady_state_without_queries(self):
+        SystemSettings.get_settings()
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                self.assertEqual(SystemSettings.get_settings().monthly_bonus_amount, Decimal('1000'))
+
+    def test_save_bumps_version_and_reloads(self):
+        settings_row = SystemSettings.get_settings()
+        version = SystemSettings.get_version()
+        # Копия другого процесса, который не видел сохранения
+        other_process_cache = SystemSettings._process_cache
+
+        settings_row.monthly_bonus_amount = Decimal('1500')
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_row.save()
+            self.assertEqual(SystemSettings.get_version(), version)
+        self.assertNotEqual(SystemSettings.get_version(), version)
+
+        SystemSettings._process_cache = other_process_cache
+        with self.assertNumQueries(1):
+            self.assertEqual(SystemSettings.get_settings().monthly_bonus_amount, Decimal('1500'))
+        with self.assertNumQueries(0):
+            SystemSettings.get_settings()
+
+    def test_callers_get_copies(self):
+        settings_row = SystemSettings.get_settings()
+        settings_row.monthly_bonus_amount = Decimal('1')
+        with self.assertNumQueries(0):
+            self.assertEqual(SystemSettings.get_settings().monthly_bonus_amount, Decimal('1000'))
+        self.assertIsNot(SystemSettings.get_settings(), SystemSettings.get_settings())
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class BroadcastNotificationTests(TestCase):
+    """Общие уведомления: одна запись на всех, непрочитанность по отметке last_seen_broadcast_id"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_employee(1)
+        cls.user = create_employee(2, date_joined=timezone.now() - timedelta(days=1))
+
+    def setUp(self):
+        cache.clear()
+
+    def reload(self, employee):
+        return Employee.objects.get(pk=employee.pk)
+
+    def test_broadcasts_count_as_unread(self):
+        self.assertEqual(unread_count(self.reload(self.user)), 0)
+        broadcast('Новость', 'Текст', author=self.author)
+        broadcast('Новость 2', 'Текст', author=self.author)
+
+        self.assertEqual(BroadcastNotification.objects.count(), 2)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(unread_count(self.reload(self.user)), 2)
+        # Автору его собственные уведомления не адресованы
+        self.assertEqual(unread_count(self.reload(self.author)), 0)
+
+        # Зарегистрированный позже старые общие уведомления не получает
+        newcomer = create_employee(3)
+        self.assertEqual(unread_count(newcomer), 0)
+
+    def test_mark_all_read_advances_last_seen(self):
+        broadcast('Новость', 'Текст', author=self.author)
+        latest = broadcast('Новость 2', 'Текст', author=self.author)
+
+        user = self.reload(self.user)
+        mark_all_read(user)
+        self.assertEqual(user.last_seen_broadcast_id, latest.pk)
+        self.assertEqual(self.reload(self.user).last_seen_broadcast_id, latest.pk)
+        self.assertEqual(unread_count(user), 0)
+        self.assertTrue(all(item.is_read for item in notifications_page(user)[0]))
+
+        newer = broadcast('Новость 3', 'Текст', author=self.author)
+        user = self.reload(self.user)
+        self.assertEqual(unread_count(user), 1)
+        self.assertEqual([item.is_read for item in notifications_page(user)[0]], [False, True, True])
+        self.assertEqual(notifications_page(user)[0][0].pk, newer.pk)
+
+    def test_last_seen_never_moves_back(self):
+        latest = broadcast('Новость', 'Текст', author=self.author)
+        Employee.objects.filter(pk=self.user.pk).update(last_seen_broadcast_id=latest.pk + 10)
+        mark_all_read(self.reload(self.user))
+        self.assertEqual(self.reload(self.user).last_seen_broadcast_id, latest.pk + 10)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class UnreadCounterTests(TestCase):
+    """Employee.unread_notifications_count и notifications_version при создании, прочтении и удалении уведомлений"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_employee(1)
+
+    def setUp(self):
+        cache.clear()
+
+    def notify(self, **fields):
+        return Notification.objects.create(user=self.user, type='system', title='Заголовок', message='Текст', **fields)
+
+    def counters(self):
+        user = Employee.objects.get(pk=self.user.pk)
+        return user.unread_notifications_count, user.notifications_version
+
+    def assertCounters(self, unread, version):
+        self.assertEqual(self.counters(), (unread, version))
+        self.assertEqual(Notification.objects.filter(user=self.user, is_read=False).count(), unread)
+
+    def test_create_read_delete(self):
+        first = self.notify()
+        second = self.notify()
+        self.notify(is_read=True)
+        self.assertCounters(2, 2)
+
+        first.is_read = True
+        first.save()
+        self.assertCounters(1, 3)
+        # Повторное сохранение без изменения прочитанности счетчик не трогает
+        first.save()
+        self.assertCounters(1, 3)
+        second.save(update_fields=['title'])
+        self.assertCounters(1, 3)
+
+        first.is_read = False
+        first.save()
+        self.assertCounters(2, 4)
+
+        first.delete()
+        self.assertCounters(1, 5)
+        Notification.objects.get(is_read=True).delete()
+        self.assertCounters(1, 6)
+
+    def test_mark_all_read(self):
+        for _ in range(3):
+            self.notify()
+        user = Employee.objects.get(pk=self.user.pk)
+        mark_all_read(user)
+        self.assertCounters(0, 4)
+        self.assertEqual((user.unread_notifications_count, user.notifications_version), (0, 4))
+        self.assertEqual(unread_count(user), 0)
+
+    def test_counter_never_negative(self):
+        notification = self.notify()
+        Employee.objects.filter(pk=self.user.pk).update(unread_notifications_count=0)
+        notification.delete()
+        self.assertEqual(self.counters(), (0, 2))
+
+
+@override_settings(
+    CACHES=LOCAL_CACHE,
+    DATABASE_READ_ALIAS=None,
+    MEDIA_ROOT=tempfile.mkdtemp(prefix='bonus-system-exports-'),
+    STORAGES=PAGE_STORAGES,
+)
+class ExportJobTests(TestCase):
+    """Выгрузка реестра: сборка задания в очереди, повторная отдача файла и новая версия после изменения переводов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_employee(1, is_admin=True)
+        cls.sender = create_employee(2)
+        cls.receiver = create_employee(3)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+        self.month = current_period('month')
+        self.transfer = self.send('100')
+
+    def send(self, amount, from_employee=None):
+        transfer = BonusTransfer(amount=Decimal(amount), reason='teamwork', review='Спасибо')
+        return transfer_bonus(transfer, from_employee or self.sender, self.receiver)
+
+    def export(self):
+        return self.client.get(reverse('admin_export_transfers'), {'month': self.month.value, 'format': 'excel'})
+
+    def run_worker(self):
+        call_command('run_export_worker', '--once', stdout=StringIO(), stderr=StringIO())
+
+    def ready_job(self):
+        self.assertEqual(self.export().status_code, 200)
+        self.run_worker()
+        job = ExportJob.objects.get(status='done')
+        self.assertTrue(job.file.storage.exists(job.file.name))
+        return job
+
+    def assertRebuilt(self, stale_job):
+        self.assertGreater(RegistryMonthVersion.current(self.month.first_month), stale_job.data_version)
+        response = self.export()
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertEqual(ExportJob.objects.get(status='pending').data_version, RegistryMonthVersion.current(self.month.first_month))
+
+        self.run_worker()
+        # Файл и задание старой версии удаляются после сборки новой
+        self.assertFalse(ExportJob.objects.filter(pk=stale_job.pk).exists())
+        self.assertFalse(stale_job.file.storage.exists(stale_job.file.name))
+        self.assertIsInstance(self.export(), FileResponse)
+
+    def test_pending_job_built_to_file(self):
+        response = self.export()
+        self.assertNotIsInstance(response, FileResponse)
+        job = ExportJob.objects.get()
+        self.assertEqual((job.month, job.format, job.status), (self.month.first_month, 'excel', 'pending'))
+        self.assertEqual(job.data_version, RegistryMonthVersion.current(self.month.first_month))
+
+        self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertIsNotNone(job.finished_at)
+
+        response = self.export()
+        self.assertIsInstance(response, FileResponse)
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+
+    def test_ready_job_reused_while_version_unchanged(self):
+        job = self.ready_job()
+        with mock.patch('employees.exports.write_transfers_excel') as writer:
+            for _ in range(2):
+                self.assertIsInstance(self.export(), FileResponse)
+                self.run_worker()
+        writer.assert_not_called()
+        self.assertEqual(list(ExportJob.objects.values_list('pk', flat=True)), [job.pk])
+
+    def test_cancelled_transfer_invalidates_job(self):
+        job = self.ready_job()
+        cancel_transfer(self.transfer, self.admin)
+        self.assertRebuilt(job)
+
+    def test_deleted_transfer_invalidates_job(self):
+        # Переводы удаляются физически вместе с учетной записью отправителя
+        other_sender = create_employee(4)
+        self.send('50', from_employee=other_sender)
+        job = self.ready_job()
+        other_sender.delete()
+        self.assertRebuilt(job)
+
+
+class ResolvePeriodTests(TestCase):
+    """resolve_period: границы [start, end) в TIME_ZONE и текущий период при некорректных параметрах"""
+
+    def local(self, *args):
+        return timezone.make_aware(datetime(*args))
+
+    def test_month_quarter_year_boundaries(self):
+        cases = [
+            ('month', '2024-02', '2024-02', 'Февраль 2024', (2024, 2, 1), (2024, 3, 1), date(2024, 2, 1)),
+            ('month', '2024-12', '2024-12', 'Декабрь 2024', (2024, 12, 1), (2025, 1, 1), date(2024, 12, 1)),
+            ('quarter', '2024-Q1', '2024-Q1', '1 квартал 2024', (2024, 1, 1), (2024, 4, 1), date(2024, 3, 1)),
+            ('quarter', '2024-Q4', '2024-Q4', '4 квартал 2024', (2024, 10, 1), (2025, 1, 1), date(2024, 12, 1)),
+            ('year', '2024', '2024', '2024 год', (2024, 1, 1), (2025, 1, 1), date(2024, 12, 1)),
+        ]
+        for period_type, period_value, value, label, start, end, last_month in cases:
+            with self.subTest(period_type=period_type, period_value=period_value):
+                period = resolve_period(period_type, period_value)
+                self.assertEqual((period.type, period.value, period.label), (period_type, value, label))
+                self.assertEqual((period.start, period.end), (self.local(*start), self.local(*end)))
+                self.assertEqual(period.start.utcoffset(), timedelta(hours=3))
+                self.assertEqual((period.first_month, period.last_month), (date(*start), last_month))
+
+    def test_half_open_range_in_project_time_zone(self):
+        sender, receiver = create_employee(1), create_employee(2)
+        moments = {
+            # Последние минуты февраля по Москве
+            'february_last': self.local(2024, 2, 29, 23, 30),
+            'march_first': self.local(2024, 3, 1),
+            'march_last': self.local(2024, 3, 31, 23, 59, 59, 999999),
+            'april_first': self.local(2024, 4, 1),
+            # 01.03 01:00 по Москве — в UTC еще 29.02
+            'march_utc_february': datetime(2024, 2, 29, 22, 0, tzinfo=dt_timezone.utc),
+        }
+        transfers = {}
+        for name, moment in moments.items():
+            transfer = BonusTransfer.objects.create(from_employee=sender, to_employee=receiver, amount=1, reason='teamwork')
+            BonusTransfer.objects.filter(pk=transfer.pk).update(created_at=moment)
+            transfers[transfer.pk] = name
+
+        def found(period_type, period_value):
+            period = resolve_period(period_type, period_value)
+            pks = BonusTransfer.objects.filter(**period.filter_kwargs()).values_list('pk', flat=True)
+            return {transfers[pk] for pk in pks}
+
+        self.assertEqual(found('month', '2024-02'), {'february_last'})
+        self.assertEqual(found('month', '2024-03'), {'march_first', 'march_last', 'march_utc_february'})
+        self.assertEqual(found('quarter', '2024-Q1'), set(moments) - {'april_first'})
+        self.assertEqual(found('quarter', '2024-Q2'), {'april_first'})
+        self.assertEqual(found('year', '2024'), set(moments))
+
+    def test_invalid_parameters_fall_back_to_current_period(self):
+        cases = [
+            ('month', None), ('month', ''), ('month', 'март'), ('month', '2024-13'), ('month', '2024-00'),
+            ('month', '2024-1-1'), ('month', '9999-12'), ('month', '0-05'),
+            ('quarter', '2024-Q0'), ('quarter', '2024-Q5'), ('quarter', '2024'), ('quarter', '2024-4'),
+            ('year', 'two thousand'), ('year', '0'), ('year', '9999'), ('year', '1' * 400),
+        ]
+        for period_type, period_value in cases:
+            with self.subTest(period_type=period_type, period_value=period_value):
+                self.assertEqual(resolve_period(period_type, period_value), current_period(period_type))
+        # Неизвестный тип — месяц
+        self.assertEqual(resolve_period('week', '2024-05'), month_period(2024, 5))
+        self.assertEqual(resolve_period('week'), current_period('month'))
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class MonthlyBonusSummaryTests(TestCase):
+    """Помесячные итоги MonthlyBonusSummary совпадают с агрегатом по переводам после переводов, отмен и пересчета"""
+
+    # Моменты переводов по Москве; 01.04 00:30 — апрель, хотя в UTC еще 31.03
+    MOMENTS = [(2024, 3, 1, 0, 0), (2024, 3, 15, 12, 0), (2024, 3, 31, 23, 59), (2024, 4, 1, 0, 30), (2024, 5, 20, 9, 0)]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_employee(1, is_admin=True)
+        cls.sender = create_employee(2, monthly_bonus_balance=Decimal('10000'))
+        cls.receivers = [create_employee(3), create_employee(4)]
+
+    def setUp(self):
+        cache.clear()
+
+    def make_transfers(self):
+        transfers = []
+        for number, moment in enumerate(self.MOMENTS * 2):
+            transfer = BonusTransfer(amount=Decimal(10 * (number + 1)), reason='teamwork', review='Спасибо')
+            with mock.patch('django.utils.timezone.now', return_value=timezone.make_aware(datetime(*moment))):
+                transfers.append(transfer_bonus(transfer, self.sender, self.receivers[number % 2]))
+        for transfer in transfers[1::3]:
+            cancel_transfer(transfer, self.admin)
+        return transfers
+
+    def summaries(self):
+        return {
+            (summary.employee_id, summary.month): (summary.total_amount, summary.transfers_count)
+            for summary in MonthlyBonusSummary.objects.filter(transfers_count__gt=0)
+        }
+
+    def expected(self):
+        totals = {}
+        for transfer in BonusTransfer.objects.filter(is_deleted=False):
+            key = (transfer.to_employee_id, MonthlyBonusSummary.month_of(transfer.created_at))
+            total, count = totals.get(key, (Decimal('0'), 0))
+            totals[key] = (total + transfer.amount, count + 1)
+        return totals
+
+    def test_rollup_matches_transfers(self):
+        self.make_transfers()
+        expected = self.expected()
+        self.assertEqual(
+            {month for _, month in expected},
+            {date(2024, 3, 1), date(2024, 4, 1), date(2024, 5, 1)},
+        )
+        self.assertEqual(self.summaries(), expected)
+        # Строки, все переводы которых отменены, остаются нулевыми
+        self.assertFalse(MonthlyBonusSummary.objects.filter(transfers_count=0).exclude(total_amount=0).exists())
+
+    def test_rebuild_command_reproduces_rollup(self):
+        self.make_transfers()
+        rollup = self.summaries()
+        period = month_period(2024, 3)
+        version = data_version(period)
+
+        call_command('rebuild_bonus_summary', stdout=StringIO())
+        self.assertEqual(self.summaries(), rollup)
+        self.assertEqual(self.summaries(), self.expected())
+        self.assertFalse(MonthlyBonusSummary.objects.filter(transfers_count=0).exists())
+        # Итоги изменены в обход переводов: кэш рейтинга сброшен
+        self.assertNotEqual(data_version(period), version)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class CelebrationsTests(TestCase):
+    """Календарь событий: 29 февраля, годовщины работы и сброс индекса при изменениях и в полночь"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.leap = StaffMember.objects.create(
+            last_name='Лебедев', first_name='Роман', birth_date=date(2000, 2, 29), office_start_date=date(2016, 2, 29),
+        )
+        cls.veteran = StaffMember.objects.create(
+            last_name='Соколов', first_name='Павел', birth_date=date(1980, 6, 10), office_start_date=date(2015, 6, 10),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def events(self, day, kinds=None):
+        return [(event.kind, event.person_id, event.years) for event in celebrations.events_on(day, kinds)]
+
+    def test_february_29_in_non_leap_year(self):
+        birthday = (celebrations.STAFF_BIRTHDAY, self.leap.pk, None)
+        self.assertIn(birthday, self.events(date(2023, 2, 28)))
+        self.assertNotIn(birthday, self.events(date(2023, 3, 1)))
+        self.assertIn(birthday, self.events(date(2024, 2, 29)))
+        self.assertNotIn(birthday, self.events(date(2024, 2, 28)))
+
+        february = celebrations.month_events(2023, 2, kinds={celebrations.STAFF_BIRTHDAY})
+        self.assertEqual([(event.date, event.person_id) for event in february], [(date(2023, 2, 28), self.leap.pk)])
+
+    def test_work_anniversaries(self):
+        kinds = {celebrations.ANNIVERSARY}
+        self.assertEqual(self.events(date(2025, 6, 10), kinds), [(celebrations.ANNIVERSARY, self.veteran.pk, 10)])
+        # В день выхода на работу и до него годовщины нет
+        self.assertEqual(self.events(date(2015, 6, 10), kinds), [])
+        self.assertEqual(self.events(date(2014, 6, 10), kinds), [])
+        self.assertEqual(self.events(date(2025, 2, 28), kinds), [(celebrations.ANNIVERSARY, self.leap.pk, 9)])
+        self.assertEqual(self.events(date(2028, 2, 29), kinds), [(celebrations.ANNIVERSARY, self.leap.pk, 12)])
+        self.assertEqual(
+            self.events(date(2025, 6, 10)),
+            [(celebrations.STAFF_BIRTHDAY, self.veteran.pk, None), (celebrations.ANNIVERSARY, self.veteran.pk, 10)],
+        )
+
+    def test_index_invalidated_when_staff_changes(self):
+        day = date(2025, 9, 1)
+        self.assertEqual(self.events(day), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            staff = StaffMember.objects.create(last_name='Козлов', first_name='Олег', birth_date=date(1990, 9, 1))
+            # Сброс после фиксации: до нее индекс прежний
+            self.assertEqual(self.events(day), [])
+        self.assertEqual(self.events(day), [(celebrations.STAFF_BIRTHDAY, staff.pk, None)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StaffMember.objects.filter(pk=staff.pk).get().delete()
+        self.assertEqual(self.events(day), [])
+
+        # Вход пользователя календарь не затрагивает
+        employee = create_employee(1)
+        celebrations.calendar_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            celebrations.calendar_index()
+
+    def test_index_rebuilt_after_midnight(self):
+        today = timezone.localdate()
+        celebrations.calendar_index()
+        with self.assertNumQueries(0):
+            celebrations.calendar_index()
+
+        with mock.patch('django.utils.timezone.localdate', return_value=today + timedelta(days=1)):
+            with self.assertNumQueries(3):
+                celebrations.calendar_index()
+
+        late_evening = timezone.make_aware(datetime.combine(today, datetime.min.time())) + timedelta(hours=23, minutes=59, seconds=30)
+        with mock.patch('django.utils.timezone.localtime', return_value=late_evening):
+            self.assertEqual(celebrations._seconds_until_midnight(), 30)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class MonthlyBalanceResetTests(TestCase):
+    """reset_all_monthly_balances: участники премирования сбрасываются один раз за месяц"""
+
+    @classmethod
+    def setUpTestData(cls):
+        last_month = Employee.current_balance_period() - timedelta(days=1)
+        cls.stale = [create_employee(number, monthly_bonus_balance=Decimal('30'), last_balance_reset=last_month) for number in (1, 2)]
+        cls.fresh = create_employee(3, monthly_bonus_balance=Decimal('40'))
+        cls.outsider = create_employee(
+            4, monthly_bonus_balance=Decimal('50'), last_balance_reset=last_month, participates_in_bonus=False,
+        )
+
+    def setUp(self):
+        cache.clear()
+        SystemSettings._process_cache = None
+        self.addCleanup(setattr, SystemSettings, '_process_cache', None)
+
+    def balance(self, employee):
+        return Employee.objects.get(pk=employee.pk).monthly_bonus_balance
+
+    def test_second_run_resets_nothing(self):
+        self.assertEqual(Employee.reset_all_monthly_balances(), 2)
+        for employee in self.stale:
+            self.assertEqual(self.balance(employee), Decimal('1000'))
+            self.assertEqual(Employee.objects.get(pk=employee.pk).last_balance_reset, timezone.localdate())
+        self.assertEqual(self.balance(self.fresh), Decimal('40'))
+        self.assertEqual(self.balance(self.outsider), Decimal('50'))
+
+        # Потраченное после сброса повторный запуск не возвращает
+        Employee.objects.filter(pk=self.stale[0].pk).update(monthly_bonus_balance=Decimal('700'))
+        self.assertEqual(Employee.reset_all_monthly_balances(), 0)
+        self.assertEqual(self.balance(self.stale[0]), Decimal('700'))
+
+    def test_command_and_request_reset_once(self):
+        stdout = StringIO()
+        call_command('reset_monthly_balances', stdout=stdout)
+        self.assertIn('2 сотрудников', stdout.getvalue())
+
+        employee = Employee.objects.get(pk=self.stale[1].pk)
+        Employee.objects.filter(pk=employee.pk).update(monthly_bonus_balance=Decimal('600'))
+        # Копия из памяти видит сброс команды и не сбрасывает баланс повторно
+        employee.last_balance_reset = Employee.current_balance_period() - timedelta(days=1)
+        employee.reset_monthly_balance()
+        self.assertEqual(employee.monthly_bonus_balance, Decimal('600'))
+        self.assertEqual(self.balance(employee), Decimal('600'))
@@ -0,0 +1,98 @@
+"""
+Миниатюры фотографий сотрудников (Employee.photo, StaffMember.photo).
+
+Для каждого фото строятся квадратные варианты THUMBNAIL_SIZES в WebP
+(JPEG, если Pillow собран без WebP) с детерминированными именами
+thumbs/<путь оригинала>_<размер>.<расширение>. Загрузка нового фото всегда дает
+новое имя файла, поэтому миниатюры не нужно инвалидировать.
+
+Миниатюры строятся в фоновом потоке после фиксации транзакции (signals.py);
+пропущенные (например, при перезапуске процесса) достраивает команда
+build_photo_thumbnails. Пока миниатюры нет, шаблонный тег отдает оригинал.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = (64, 256)
+
+if features.check('webp'):
+    THUMBNAIL_FORMAT, THUMBNAIL_EXTENSION = 'WEBP', 'webp'
+else:
+    THUMBNAIL_FORMAT, THUMBNAIL_EXTENSION = 'JPEG', 'jpg'
+
+# Один поток: миниатюры строятся по очереди и не конкурируют с запросами за CPU
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thumbnails')
+
+
+def thumbnail_name(name, size):
+    """Имя файла миниатюры размера size для оригинала name"""
+    root, _ = os.path.splitext(name)
+    return f'thumbs/{root}_{size}.{THUMBNAIL_EXTENSION}'
+
+
+def nearest_size(size):
+    """Наименьший вариант не меньше size (или наибольший)"""
+    for variant in THUMBNAIL_SIZES:
+        if variant >= size:
+            return variant
+    return THUMBNAIL_SIZES[-1]
+
+
+def has_thumbnails(name, storage=default_storage):
+    return all(storage.exists(thumbnail_name(name, size)) for size in THUMBNAIL_SIZES)
+
+
+def build_thumbnails(name, storage=default_storage, force=False):
+    """Строит недостающие миниатюры для оригинала name; возвращает число созданных"""
+    missing = [size for size in THUMBNAIL_SIZES if force or not storage.exists(thumbnail_name(name, size))]
+    if not missing:
+        return 0
+
+    with storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        # JPEG декодируется сразу в уменьшенном масштабе (не меньше нужного размера)
+        image.draft('RGB', (max(missing), max(missing)))
+        # Фото с телефона: ориентация хранится в EXIF
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+        for size in missing:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            buffer = BytesIO()
+            thumbnail.save(buffer, THUMBNAIL_FORMAT, quality=85)
+            target = thumbnail_name(name, size)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+    return len(missing)
+
+
+def _build_in_background(name):
+    try:
+        build_thumbnails(name)
+    except Exception:
+        # Ошибка не должна теряться молча: фото останется без миниатюр до backfill
+        logger.exception('Не удалось построить миниатюры для %s', name)
+
+
+def schedule_thumbnails(photo):
+    """Ставит построение миниатюр фото в фоновую очередь, если их еще нет"""
+    if photo and not has_thumbnails(photo.name):
+        _executor.submit(_build_in_background, photo.name)
+
+
+def thumbnail_url(photo, size):
+    """URL миниатюры фото (или оригинала, если миниатюра еще не построена)"""
+    if not photo:
+        return ''
+    name = thumbnail_name(photo.name, nearest_size(size))
+    if default_storage.exists(name):
+        return default_storage.url(name)
+    return photo.url
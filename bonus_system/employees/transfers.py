@@ -0,0 +1,113 @@
+"""
+Проведение и отмена переводов бонусов.
+
+Балансы меняются только выражениями F() внутри одной транзакции вместе с записью
+перевода, итогами рейтинга и уведомлениями, поэтому параллельные переводы не
+теряют обновлений и не уводят баланс отправителя в минус.
+"""
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import live
+from .models import Employee, BonusTransfer, Notification, MonthlyBonusSummary, RegistryMonthVersion
+
+
+class TransferError(Exception):
+    """Перевод невозможен; текст исключения показывается пользователю"""
+
+
+def transfer_bonus(transfer, from_employee, to_employee):
+    """
+    Проводит перевод transfer (несохраненный BonusTransfer) от from_employee к to_employee.
+    Списание выполняется условным UPDATE ... WHERE monthly_bonus_balance >= amount.
+    """
+    amount = transfer.amount
+    if amount <= 0:
+        raise TransferError('Сумма перевода должна быть больше нуля')
+    if from_employee.pk == to_employee.pk:
+        raise TransferError('Нельзя переводить деньги самому себе!')
+    if not to_employee.participates_in_bonus:
+        raise TransferError('Этот сотрудник не участвует в системе премирования')
+
+    with transaction.atomic():
+        debited = Employee.objects.filter(
+            pk=from_employee.pk,
+            participates_in_bonus=True,
+            monthly_bonus_balance__gte=amount,
+        ).update(monthly_bonus_balance=F('monthly_bonus_balance') - amount)
+        if not debited:
+            raise TransferError('Недостаточно средств')
+
+        Employee.objects.filter(pk=to_employee.pk).update(
+            received_bonus_balance=F('received_bonus_balance') + amount
+        )
+
+        transfer.from_employee = from_employee
+        transfer.to_employee = to_employee
+        transfer.save()
+        MonthlyBonusSummary.apply_transfer(transfer)
+        RegistryMonthVersion.bump(transfer.created_at)
+
+        # Создаем уведомление для получателя (если он зарегистрирован)
+        if to_employee.is_active:
+            notification = Notification.objects.create(
+                user=to_employee,
+                type='transfer_received',
+                title='Получен перевод бонусов',
+                message=f'Вы получили {amount} руб. от {from_employee.get_full_name()}. Причина: {transfer.get_reason_display()}',
+                related_transfer=transfer
+            )
+            live.publish_notification(notification)
+        live.publish_state(from_employee.pk)
+
+    from_employee.refresh_from_db(fields=['monthly_bonus_balance'])
+    return transfer
+
+
+def cancel_transfer(transfer, deleted_by):
+    """
+    Отмена перевода администратором: средства возвращаются отправителю,
+    у получателя вычитаются (не ниже нуля), обоим отправляются уведомления.
+    """
+    with transaction.atomic():
+        # Условная пометка защищает от повторной отмены одного перевода
+        marked = BonusTransfer.objects.filter(pk=transfer.pk, is_deleted=False).update(
+            is_deleted=True,
+            deleted_by=deleted_by,
+            deleted_at=timezone.now(),
+        )
+        if not marked:
+            raise TransferError('Перевод уже удален')
+        transfer.refresh_from_db(fields=['is_deleted', 'deleted_by', 'deleted_at'])
+
+        Employee.objects.filter(pk=transfer.from_employee_id).update(
+            monthly_bonus_balance=F('monthly_bonus_balance') + transfer.amount
+        )
+        Employee.objects.filter(pk=transfer.to_employee_id).update(
+            received_bonus_balance=Greatest(F('received_bonus_balance') - transfer.amount, Value(0))
+        )
+        MonthlyBonusSummary.apply_transfer(transfer, sign=-1)
+        RegistryMonthVersion.bump(transfer.created_at)
+
+        # Создаем уведомление для получателя
+        receiver_notification = Notification.objects.create(
+            user=transfer.to_employee,
+            type='transfer_cancelled',
+            title='Перевод отменен',
+            message=f'Перевод на сумму {transfer.amount} руб. от {transfer.from_employee.get_full_name()} был отменен администратором.',
+            related_transfer=transfer
+        )
+
+        # Создаем уведомление для отправителя
+        sender_notification = Notification.objects.create(
+            user=transfer.from_employee,
+            type='transfer_cancelled',
+            title='Перевод отменен',
+            message=f'Ваш перевод на сумму {transfer.amount} руб. для {transfer.to_employee.get_full_name()} был отменен администратором. Средства возвращены на ваш баланс.',
+            related_transfer=transfer
+        )
+        live.publish_notification(receiver_notification)
+        live.publish_notification(sender_notification)
+    return transfer
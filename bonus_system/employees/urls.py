@@ -7,18 +7,27 @@ urlpatterns = [
     path('home/', views.home_view, name='home'),
     path('employees/', views.employees_list_view, name='employees_list'),
     path('reviews/', views.reviews_list_view, name='reviews_list'),
+    path('reviews/more/', views.reviews_more_view, name='reviews_more'),
     path('rating/', views.rating_view, name='rating'),
     path('bonus-transfer/', views.bonus_transfer_view, name='bonus_transfer'),
     path('profile/', views.profile_view, name='profile'),
+    path('profile/sent/more/', views.profile_reviews_more_view, {'direction': 'sent'}, name='profile_sent_more'),
+    path('profile/received/more/', views.profile_reviews_more_view, {'direction': 'received'}, name='profile_received_more'),
     path('logout/', views.logout_view, name='logout'),
     path('api/positions/', views.get_positions_by_department, name='get_positions_by_department'),
+    path('api/events/upcoming/', views.upcoming_events_view, name='upcoming_events'),
+    path('api/roster/', views.roster_view, name='roster'),
+    path('api/leaderboard/', views.leaderboard_api_view, name='leaderboard_api'),
     path('notifications/', views.notifications_view, name='notifications'),
+    path('notifications/more/', views.notifications_more_view, name='notifications_more'),
+    path('notifications/stream/', views.notifications_stream_view, name='notifications_stream'),
     path('app-admin/', views.admin_panel_view, name='admin_panel'),
     path('app-admin/staff/', views.admin_staff_manage_view, name='admin_staff_manage'),
     path('app-admin/staff/<int:staff_id>/edit/', views.admin_staff_edit_view, name='admin_staff_edit'),
     path('app-admin/staff/<int:staff_id>/delete/', views.admin_staff_delete_view, name='admin_staff_delete'),
     path('app-admin/users/<int:employee_id>/delete/', views.admin_user_delete_view, name='admin_user_delete'),
     path('app-admin/transfers/', views.admin_transfers_view, name='admin_transfers'),
+    path('app-admin/transfers/more/', views.admin_transfers_more_view, name='admin_transfers_more'),
     path('app-admin/transfers/<int:transfer_id>/delete/', views.admin_transfer_delete_view, name='admin_transfer_delete'),
     path('app-admin/news/create/', views.admin_news_create_view, name='admin_news_create'),
     path('app-admin/bonus-participation/', views.admin_bonus_participation_view, name='admin_bonus_participation'),
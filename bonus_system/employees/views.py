@@ -3,24 +3,31 @@ from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Sum, Count
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.urls import reverse
+from django.utils.cache import quote_etag
+from django.views.decorators.http import condition
 from django.utils import timezone
 from datetime import date, datetime, timedelta
-from .models import Employee, Department, Position, News, BonusTransfer, Holiday, StaffMember, Notification, SystemSettings
+from collections import defaultdict
+from .models import Employee, Department, Position, News, BonusTransfer, Holiday, StaffMember, Notification, SystemSettings, RegistryMonthVersion, ExportJob
 from .forms import EmployeeRegistrationForm, EmployeeLoginForm, BonusTransferForm, ProfileEditForm, NewsForm, StaffMemberForm
+from .exports import EXPORT_FORMATS, registry_filename
+from .periods import MONTH_NAMES_RU, resolve_period, current_period
+from .notifications import unread_count, notifications_page, mark_all_read, broadcast
+from .pagination import keyset_page
+from .search import search_staff
+from .roster import match_employee, roster_etag, roster_payload, staff_name_index
+from . import celebrations
+from .leaderboard import leaderboard, rank_window
+from .transfers import transfer_bonus, cancel_transfer, TransferError
+from .db import read_only_view
+from .live import event_stream
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse
 from django.template.loader import render_to_string
-import openpyxl
-from openpyxl.styles import Font, Alignment
-from calendar import monthrange
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import mm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 import os
 
 
@@ -90,16 +97,8 @@ def home_view(request):
     news = News.objects.all()[:5]
     
     # Рейтинг за текущий месяц
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    rating = Employee.objects.filter(participates_in_bonus=True).annotate(
-        total_received=Sum(
-            'received_transfers__amount',
-            filter=Q(received_transfers__created_at__month=current_month,
-                    received_transfers__created_at__year=current_year,
-                    received_transfers__is_deleted=False)
-        )
-    ).filter(total_received__isnull=False).order_by('-total_received')[:10]
+    current_month = timezone.localdate().month
+    rating = leaderboard(current_period('month'))[:10]
     
     # Новые отзывы (последние 5) - исключаем удаленные
     recent_reviews = BonusTransfer.objects.filter(is_deleted=False).select_related('from_employee', 'to_employee').order_by('-created_at')[:5]
@@ -117,23 +116,18 @@ def home_view(request):
             notification_sent=False
         ).update(notification_sent=True)
     
-    # Проверка дней рождения и праздников
-    today = date.today()
-    birthdays = Employee.objects.filter(
-        birth_date__month=today.month,
-        birth_date__day=today.day
-    ).exclude(id=request.user.id)
-    
-    holidays = Holiday.objects.filter(
-        date=today,
-        is_annual=True
-    )
+    # Дни рождения, праздники и годовщины — из календаря событий, собранного на сегодня
+    today = timezone.localdate()
+    today_events = celebrations.events_on(today)
+    birthdays = [
+        event for event in today_events
+        if event.kind == celebrations.BIRTHDAY and event.person_id != request.user.id
+    ]
+    holidays = [event for event in today_events if event.kind == celebrations.HOLIDAY]
+    anniversaries = [event for event in today_events if event.kind == celebrations.ANNIVERSARY]
     
     # Дни рождения в этом месяце (для новостей)
-    month_birthdays = StaffMember.objects.filter(
-        birth_date__month=current_month,
-        is_active=True
-    ).select_related('department', 'position').order_by('birth_date__day')
+    month_birthdays = celebrations.month_events(today.year, today.month, kinds=[celebrations.STAFF_BIRTHDAY])
     
     context = {
         'news': news,
@@ -142,6 +136,7 @@ def home_view(request):
         'unread_transfers': unread_transfers,
         'birthdays': birthdays,
         'holidays': holidays,
+        'anniversaries': anniversaries,
         'month_birthdays': month_birthdays,
         'current_month': current_month,
     }
@@ -150,6 +145,7 @@ def home_view(request):
 
 
 @login_required
+@read_only_view
 def employees_list_view(request):
     # Используем модель StaffMember вместо Employee - это сотрудники компании, не зарегистрированные в системе
     employees = StaffMember.objects.select_related('department', 'position', 'employee_profile').filter(is_active=True)
@@ -164,13 +160,7 @@ def employees_list_view(request):
     if position_filter:
         employees = employees.filter(position_id=position_filter)
     if search_query:
-        employees = employees.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(middle_name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(phone__icontains=search_query)
-        )
+        employees = search_staff(employees, search_query)
     
     departments = Department.objects.all()
     # Фильтруем должности только с указанным отделом, если выбран отдел
@@ -191,12 +181,18 @@ def employees_list_view(request):
     return render(request, 'employees/employees_list.html', context)
 
 
-@login_required
-def reviews_list_view(request):
-    # Исключаем удаленные переводы
-    reviews = BonusTransfer.objects.filter(is_deleted=False).select_related('from_employee', 'to_employee').all()
+def _load_more_response(request, template_name, context, next_cursor):
+    """Ответ эндпоинта «Показать еще»: HTML следующей страницы и курсор после нее"""
+    return JsonResponse({
+        'html': render_to_string(template_name, context, request=request),
+        'next_cursor': next_cursor,
+    })
+
+
+def _reviews_queryset(request):
+    """Неудаленные переводы с фильтрами страницы отзывов"""
+    reviews = BonusTransfer.objects.filter(is_deleted=False).select_related('from_employee', 'to_employee')
     
-    # Фильтрация
     employee_filter = request.GET.get('employee')
     month_filter = request.GET.get('month')
     my_reviews = request.GET.get('my_reviews')
@@ -212,10 +208,19 @@ def reviews_list_view(request):
         )
     
     if month_filter:
-        year, month = month_filter.split('-')
-        month = int(month)
-        year = int(year)
-        reviews = reviews.filter(created_at__month=month, created_at__year=year)
+        reviews = reviews.filter(**resolve_period('month', month_filter).filter_kwargs())
+    
+    return reviews
+
+
+@login_required
+@read_only_view
+def reviews_list_view(request):
+    reviews, next_cursor = keyset_page(_reviews_queryset(request))
+    
+    # Фильтры страницы передаются и в запросы следующих страниц
+    params = request.GET.copy()
+    params.pop('cursor', None)
     
     employees = Employee.objects.all()
     
@@ -227,78 +232,45 @@ def reviews_list_view(request):
     
     context = {
         'reviews': reviews,
+        'next_cursor': next_cursor,
+        'load_more_url': f"{reverse('reviews_more')}?{params.urlencode()}",
         'employees': employees,
         'months': months,
-        'selected_employee': employee_filter,
-        'selected_month': month_filter,
-        'my_reviews': my_reviews,
+        'selected_employee': request.GET.get('employee'),
+        'selected_month': request.GET.get('month'),
+        'my_reviews': request.GET.get('my_reviews'),
     }
     
     return render(request, 'employees/reviews_list.html', context)
 
 
 @login_required
+@read_only_view
+def reviews_more_view(request):
+    """Следующая страница отзывов (JSON)"""
+    reviews, next_cursor = keyset_page(_reviews_queryset(request), request.GET.get('cursor'))
+    return _load_more_response(request, 'employees/_review_items.html', {'reviews': reviews}, next_cursor)
+
+
+@login_required
+@read_only_view
 def rating_view(request):
     period_type = request.GET.get('period', 'month')  # month, quarter, year
     period_value = request.GET.get('period_value')
     
-    month_names_ru = {
-        1: 'Январь', 2: 'Февраль', 3: 'Март', 4: 'Апрель',
-        5: 'Май', 6: 'Июнь', 7: 'Июль', 8: 'Август',
-        9: 'Сентябрь', 10: 'Октябрь', 11: 'Ноябрь', 12: 'Декабрь'
-    }
-    
-    now = timezone.now()
+    now = timezone.localtime()
     current_year = now.year
-    current_month = now.month
-    current_quarter = (current_month - 1) // 3 + 1
     
     # Определяем период для фильтрации
-    if period_type == 'year':
-        if period_value:
-            year = int(period_value)
-        else:
-            year = current_year
-        start_date = date(year, 1, 1)
-        end_date = date(year, 12, 31)
-        period_label = f'{year} год'
-    elif period_type == 'quarter':
-        if period_value:
-            year, quarter = map(int, period_value.split('-Q'))
-        else:
-            year = current_year
-            quarter = current_quarter
-        start_month = (quarter - 1) * 3 + 1
-        end_month = quarter * 3
-        start_date = date(year, start_month, 1)
-        last_day = monthrange(year, end_month)[1]
-        end_date = date(year, end_month, last_day)
-        period_label = f'{quarter} квартал {year}'
-    else:  # month
-        if period_value:
-            year, month = map(int, period_value.split('-'))
-        else:
-            year = current_year
-            month = current_month
-        start_date = date(year, month, 1)
-        last_day = monthrange(year, month)[1]
-        end_date = date(year, month, last_day)
-        period_label = f'{month_names_ru[month]} {year}'
-    
-    # Фильтруем переводы по периоду
-    rating = Employee.objects.filter(participates_in_bonus=True).annotate(
-        total_received=Sum(
-            'received_transfers__amount',
-            filter=Q(received_transfers__created_at__date__gte=start_date,
-                    received_transfers__created_at__date__lte=end_date,
-                    received_transfers__is_deleted=False)
-        )
-    ).filter(total_received__isnull=False).order_by('-total_received')
+    period = resolve_period(period_type, period_value)
+    
+    # Рейтинг за период из кэша (ключ включает версию данных периода)
+    rating = leaderboard(period)
     
     # Данные для диаграммы
     chart_data = {
-        'labels': [emp.get_full_name() for emp in rating[:10]],
-        'data': [float(emp.total_received or 0) for emp in rating[:10]],
+        'labels': [row.full_name for row in rating[:10]],
+        'data': [float(row.total_received or 0) for row in rating[:10]],
     }
     
     # Генерация списков для фильтров
@@ -308,7 +280,7 @@ def rating_view(request):
         month_num = date_obj.month
         months.append({
             'value': date_obj.strftime('%Y-%m'),
-            'label': f'{month_names_ru[month_num]} {date_obj.year}'
+            'label': f'{MONTH_NAMES_RU[month_num]} {date_obj.year}'
         })
     
     quarters = []
@@ -332,9 +304,9 @@ def rating_view(request):
         'months': months,
         'quarters': quarters,
         'years': years,
-        'period_type': period_type,
-        'period_value': period_value or (f'{current_year}-{current_month:02d}' if period_type == 'month' else f'{current_year}-Q{current_quarter}' if period_type == 'quarter' else str(current_year)),
-        'period_label': period_label,
+        'period_type': period.type,
+        'period_value': period.value,
+        'period_label': period.label,
     }
     
     return render(request, 'employees/rating.html', context)
@@ -354,29 +326,13 @@ def bonus_transfer_view(request):
     preselected_employee = None
     if preselected_staff_id:
         try:
-            staff = StaffMember.objects.get(id=preselected_staff_id)
+            staff = StaffMember.objects.select_related('employee_profile').get(id=preselected_staff_id)
             if staff.employee_profile:
                 preselected_employee = staff.employee_profile
             else:
                 # Ищем Employee по совпадению ФИО
-                full_name_parts = [staff.last_name, staff.first_name, staff.middle_name]
-                full_name = ' '.join([p for p in full_name_parts if p]).strip()
-                try:
-                    employee = Employee.objects.get(
-                        last_name=staff.last_name,
-                        first_name=staff.first_name,
-                        middle_name=staff.middle_name or ''
-                    )
-                    preselected_employee = employee
-                except (Employee.DoesNotExist, Employee.MultipleObjectsReturned):
-                    # Если не найдено или несколько, пробуем найти по полному имени
-                    employees = Employee.objects.filter(
-                        last_name=staff.last_name,
-                        first_name=staff.first_name
-                    )
-                    if employees.exists():
-                        preselected_employee = employees.first()
-        except StaffMember.DoesNotExist:
+                preselected_employee = match_employee(staff, staff_name_index(staff))
+        except (StaffMember.DoesNotExist, ValueError):
             pass
     
     if request.method == 'POST':
@@ -398,14 +354,9 @@ def bonus_transfer_view(request):
                 if staff.employee_profile:
                     to_employee = staff.employee_profile
                 else:
-                    # Ищем по ФИО
-                    try:
-                        to_employee = Employee.objects.get(
-                            last_name=staff.last_name,
-                            first_name=staff.first_name,
-                            middle_name=staff.middle_name or ''
-                        )
-                    except Employee.DoesNotExist:
+                    # Ищем по ФИО так же, как справочник (без учета регистра и ё)
+                    to_employee = match_employee(staff, staff_name_index(staff))
+                    if to_employee is None:
                         # Создаем нового Employee по ФИО из StaffMember автоматически
                         base_username = (staff.email or f"{staff.last_name}_{staff.first_name}").lower().replace(' ', '_').replace('-', '_')
                         username = base_username
@@ -474,12 +425,6 @@ def bonus_transfer_view(request):
                         # Связываем StaffMember с Employee
                         staff.employee_profile = to_employee
                         staff.save()
-                    except Employee.MultipleObjectsReturned:
-                        to_employee = Employee.objects.filter(
-                            last_name=staff.last_name,
-                            first_name=staff.first_name,
-                            middle_name=staff.middle_name or ''
-                        ).first()
             except StaffMember.DoesNotExist:
                 messages.error(request, 'Сотрудник не найден в справочнике')
                 return redirect('bonus_transfer')
@@ -504,94 +449,32 @@ def bonus_transfer_view(request):
         
         if form.is_valid():
             transfer = form.save(commit=False)
-            transfer.from_employee = request.user
-            transfer.to_employee = to_employee
-            
-            # Проверка баланса
-            if transfer.amount > request.user.monthly_bonus_balance:
-                messages.error(request, 'Недостаточно средств')
-                return redirect('bonus_transfer')
             
             # Проверка участия в системе премирования
-            if not to_employee.participates_in_bonus:
-                messages.error(request, 'Этот сотрудник не участвует в системе премирования')
-                return redirect('bonus_transfer')
-            
             if not request.user.participates_in_bonus:
                 messages.error(request, 'Вы не участвуете в системе премирования')
                 return redirect('bonus_transfer')
             
-            # Перевод
-            request.user.monthly_bonus_balance -= transfer.amount
-            request.user.save()
-            
-            to_employee.received_bonus_balance += transfer.amount
-            to_employee.save()
-            
-            transfer.save()
-            
-            # Создаем уведомление для получателя (если он зарегистрирован)
-            if to_employee.is_active:
-                Notification.objects.create(
-                    user=to_employee,
-                    type='transfer_received',
-                    title='Получен перевод бонусов',
-                    message=f'Вы получили {transfer.amount} руб. от {request.user.get_full_name()}. Причина: {transfer.get_reason_display()}',
-                    related_transfer=transfer
-                )
+            # Списание, зачисление, запись перевода и уведомление — в одной транзакции
+            try:
+                transfer_bonus(transfer, request.user, to_employee)
+            except TransferError as e:
+                messages.error(request, str(e))
+                return redirect('bonus_transfer')
             
             messages.success(request, f'Премия успешно переведена {to_employee.get_full_name()}!')
             return redirect('bonus_transfer')
     else:
         form = BonusTransferForm(from_employee=request.user, preselected_employee=preselected_employee)
     
-    # Получаем ВСЕХ сотрудников из справочника (все, кто участвует в системе премирования)
-    all_staff = StaffMember.objects.filter(
-        is_active=True,
-        participates_in_bonus=True
-    ).select_related('department', 'position', 'employee_profile').order_by('department__name', 'position__name', 'last_name', 'first_name')
-    
-    # Показываем всех сотрудников из справочника, даже если у них нет Employee
-    staff_list = []
-    for staff in all_staff:
-        # Пропускаем только текущего пользователя, если он есть в списке
-        if staff.employee_profile and staff.employee_profile.id == request.user.id:
-            continue
-        
-        # Находим Employee по ФИО (если есть), но показываем всех из справочника
-        employee = None
-        if staff.employee_profile:
-            employee = staff.employee_profile
-        else:
-            # Ищем Employee по совпадению ФИО
-            try:
-                employee = Employee.objects.get(
-                    last_name=staff.last_name,
-                    first_name=staff.first_name,
-                    middle_name=staff.middle_name or ''
-                )
-            except (Employee.DoesNotExist, Employee.MultipleObjectsReturned):
-                # Если не найдено точно, пробуем найти по фамилии и имени
-                employees = Employee.objects.filter(
-                    last_name=staff.last_name,
-                    first_name=staff.first_name
-                ).exclude(id=request.user.id)
-                if employees.exists():
-                    employee = employees.first()
-        
-        # Добавляем всех сотрудников из справочника
-        staff_list.append({
-            'staff': staff,
-            'employee': employee  # Может быть None, если Employee не найден
-        })
-    
+    # Список сотрудников строится в браузере из JSON-справочника (roster_view),
+    # который браузер перепроверяет по ETag и не скачивает повторно
     departments = Department.objects.all().order_by('name')
     positions = Position.objects.all().order_by('name')
     
     context = {
         'form': form,
         'balance': request.user.monthly_bonus_balance,
-        'all_staff': staff_list,
         'departments': departments,
         'positions': positions,
         'preselected_staff_id': preselected_staff_id,
@@ -642,20 +525,37 @@ def profile_view(request):
     if staff_member:
         staff_member_in_directory = staff_member
     
-    # Отзывы пользователя
-    sent_reviews = BonusTransfer.objects.filter(from_employee=request.user).order_by('-created_at')
-    received_reviews = BonusTransfer.objects.filter(to_employee=request.user).order_by('-created_at')
+    # Отзывы пользователя (первые страницы)
+    sent_reviews, sent_next_cursor = keyset_page(_profile_reviews_queryset(request.user, 'sent'))
+    received_reviews, received_next_cursor = keyset_page(_profile_reviews_queryset(request.user, 'received'))
     
     context = {
         'form': form,
         'sent_reviews': sent_reviews,
+        'sent_next_cursor': sent_next_cursor,
         'received_reviews': received_reviews,
+        'received_next_cursor': received_next_cursor,
         'staff_member_in_directory': staff_member_in_directory,
     }
     
     return render(request, 'employees/profile.html', context)
 
 
+def _profile_reviews_queryset(user, direction):
+    """Отправленные (sent) или полученные (received) пользователем переводы"""
+    if direction == 'sent':
+        return BonusTransfer.objects.filter(from_employee=user).select_related('to_employee')
+    return BonusTransfer.objects.filter(to_employee=user).select_related('from_employee')
+
+
+@login_required
+def profile_reviews_more_view(request, direction):
+    """Следующая страница отправленных или полученных отзывов профиля (JSON)"""
+    reviews, next_cursor = keyset_page(_profile_reviews_queryset(request.user, direction), request.GET.get('cursor'))
+    context = {'reviews': reviews, 'direction': direction}
+    return _load_more_response(request, 'employees/_profile_review_items.html', context, next_cursor)
+
+
 @login_required
 def logout_view(request):
     from django.contrib.auth import logout
@@ -663,6 +563,79 @@ def logout_view(request):
     return redirect('login')
 
 
+def _bounded_int(value, default, minimum, maximum):
+    try:
+        return max(minimum, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
+@login_required
+@read_only_view
+def leaderboard_api_view(request):
+    """
+    AJAX-эндпоинт рейтинга: первые top мест, место текущего пользователя и его соседи.
+    Параметры: period, period_value (как на странице рейтинга), top, neighbours.
+    """
+    period = resolve_period(request.GET.get('period', 'month'), request.GET.get('period_value'))
+    top = _bounded_int(request.GET.get('top'), 10, 1, 100)
+    neighbours = _bounded_int(request.GET.get('neighbours'), 2, 0, 20)
+    window = rank_window(period, request.user, top=top, neighbours=neighbours)
+    
+    def serialize(row):
+        return {
+            'rank': row.rank,
+            'employee_id': row.employee_id,
+            'full_name': row.full_name,
+            'department': row.department,
+            'total': str(row.total_received),
+        }
+    
+    return JsonResponse({
+        'period': {'type': period.type, 'value': period.value, 'label': period.label},
+        'participants': window['participants'],
+        'top': [serialize(row) for row in window['top']],
+        'me': serialize(window['me']) if window['me'] else None,
+        'around': [serialize(row) for row in window['around']],
+    })
+
+
+@login_required
+def upcoming_events_view(request):
+    """AJAX-эндпоинт: события календаря на ближайшие дни (?days=N, по умолчанию 7)"""
+    try:
+        days = int(request.GET.get('days', 7))
+    except ValueError:
+        days = 7
+    events = [
+        {
+            'kind': event.kind,
+            'date': event.date.isoformat(),
+            'title': event.title,
+            'department': event.department,
+            'position': event.position,
+            'years': event.years,
+        }
+        for event in celebrations.upcoming(days)
+    ]
+    return JsonResponse({'events': events})
+
+
+@login_required
+@read_only_view
+@condition(etag_func=roster_etag)
+def roster_view(request):
+    """JSON-справочник сотрудников для фильтрации на клиенте; повторные запросы получают 304"""
+    include_inactive = request.user.is_admin
+    payload = roster_payload(include_inactive)
+    response = JsonResponse(payload)
+    # ETag по версии, из которой собран ответ (она могла смениться после проверки условия)
+    response['ETag'] = quote_etag(roster_etag(request, payload['version']))
+    # Браузер хранит ответ, но перепроверяет его при каждом открытии страницы
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 def get_positions_by_department(request):
     """AJAX-эндпоинт для получения должностей по отделу"""
     department_id = request.GET.get('department_id')
@@ -676,22 +649,49 @@ def get_positions_by_department(request):
 @login_required
 def notifications_view(request):
     """Страница уведомлений"""
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    unread_count = notifications.filter(is_read=False).count()
-    
     # Помечаем все как прочитанные при явном запросе
     if request.method == 'GET' and 'mark_read' in request.GET:
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        mark_all_read(request.user)
         return redirect('notifications')
     
+    # Личные уведомления и общие (о новостях) объединяются при чтении
+    notifications, next_cursor = notifications_page(request.user)
     context = {
         'notifications': notifications,
-        'unread_count': unread_count,
+        'next_cursor': next_cursor,
+        'unread_count': unread_count(request.user),
     }
     
     return render(request, 'employees/notifications.html', context)
 
 
+@login_required
+def notifications_more_view(request):
+    """Следующая страница уведомлений (JSON)"""
+    notifications, next_cursor = notifications_page(request.user, request.GET.get('cursor'))
+    return _load_more_response(request, 'employees/_notification_items.html', {'notifications': notifications}, next_cursor)
+
+
+def _authenticated_user_id(request):
+    return request.user.pk if request.user.is_authenticated else None
+
+
+async def notifications_stream_view(request):
+    """Поток Server-Sent Events: новые уведомления, счетчик непрочитанных и баланс"""
+    user_id = await sync_to_async(_authenticated_user_id)(request)
+    if user_id is None:
+        return HttpResponse(status=401)
+    if not isinstance(request, ASGIRequest):
+        # Под WSGI поток занял бы рабочий процесс целиком; 204 останавливает переподключения EventSource
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(event_stream(user_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def admin_panel_view(request):
     """Панель администратора"""
@@ -724,12 +724,9 @@ def admin_staff_manage_view(request):
     else:
         form = StaffMemberForm()
     
-    # Все сотрудники — фильтрация на клиенте (как при начислении премии)
-    staff_members = StaffMember.objects.select_related('department', 'position', 'employee_profile').order_by('last_name', 'first_name')
-    
+    # Список сотрудников строится в браузере из JSON-справочника (roster_view)
     context = {
         'form': form,
-        'staff_members': staff_members,
     }
     
     return render(request, 'employees/admin_staff_manage.html', context)
@@ -800,6 +797,10 @@ def admin_user_delete_view(request, employee_id):
     return redirect('admin_staff_manage')
 
 
+def _admin_transfers_queryset():
+    return BonusTransfer.objects.filter(is_deleted=False).select_related('from_employee', 'to_employee')
+
+
 @login_required
 def admin_transfers_view(request):
     """Управление переводами для администратора"""
@@ -807,15 +808,26 @@ def admin_transfers_view(request):
         messages.error(request, 'У вас нет прав доступа')
         return redirect('home')
     
-    transfers = BonusTransfer.objects.filter(is_deleted=False).select_related('from_employee', 'to_employee').order_by('-created_at')
+    transfers, next_cursor = keyset_page(_admin_transfers_queryset())
     
     context = {
         'transfers': transfers,
+        'next_cursor': next_cursor,
     }
     
     return render(request, 'employees/admin_transfers.html', context)
 
 
+@login_required
+def admin_transfers_more_view(request):
+    """Следующая страница переводов для администратора (JSON)"""
+    if not request.user.is_admin:
+        return JsonResponse({'success': False, 'error': 'У вас нет прав доступа'}, status=403)
+    
+    transfers, next_cursor = keyset_page(_admin_transfers_queryset(), request.GET.get('cursor'))
+    return _load_more_response(request, 'employees/_admin_transfer_rows.html', {'transfers': transfers}, next_cursor)
+
+
 @login_required
 def admin_transfer_delete_view(request, transfer_id):
     """Удаление перевода администратором"""
@@ -826,38 +838,11 @@ def admin_transfer_delete_view(request, transfer_id):
     transfer = get_object_or_404(BonusTransfer, id=transfer_id)
     
     if request.method == 'POST':
-        # Возвращаем средства
-        transfer.from_employee.monthly_bonus_balance += transfer.amount
-        transfer.from_employee.save()
-        
-        transfer.to_employee.received_bonus_balance -= transfer.amount
-        if transfer.to_employee.received_bonus_balance < 0:
-            transfer.to_employee.received_bonus_balance = 0
-        transfer.to_employee.save()
-        
-        # Помечаем как удаленный
-        transfer.is_deleted = True
-        transfer.deleted_by = request.user
-        transfer.deleted_at = timezone.now()
-        transfer.save()
-        
-        # Создаем уведомление для получателя
-        Notification.objects.create(
-            user=transfer.to_employee,
-            type='transfer_cancelled',
-            title='Перевод отменен',
-            message=f'Перевод на сумму {transfer.amount} руб. от {transfer.from_employee.get_full_name()} был отменен администратором.',
-            related_transfer=transfer
-        )
-        
-        # Создаем уведомление для отправителя
-        Notification.objects.create(
-            user=transfer.from_employee,
-            type='transfer_cancelled',
-            title='Перевод отменен',
-            message=f'Ваш перевод на сумму {transfer.amount} руб. для {transfer.to_employee.get_full_name()} был отменен администратором. Средства возвращены на ваш баланс.',
-            related_transfer=transfer
-        )
+        try:
+            cancel_transfer(transfer, request.user)
+        except TransferError as e:
+            messages.warning(request, str(e))
+            return redirect('admin_transfers')
         
         messages.success(request, 'Перевод удален, средства возвращены')
         return redirect('admin_transfers')
@@ -883,15 +868,13 @@ def admin_news_create_view(request):
             news.author = request.user
             news.save()
             
-            # Создаем уведомления для всех пользователей
-            employees = Employee.objects.exclude(id=request.user.id)
-            for employee in employees:
-                Notification.objects.create(
-                    user=employee,
-                    type='news',
-                    title='Новая новость',
-                    message=f'{news.title}',
-                )
+            # Одно общее уведомление для всех пользователей (кроме автора)
+            broadcast(
+                type='news',
+                title='Новая новость',
+                message=f'{news.title}',
+                author=request.user,
+            )
             
             messages.success(request, 'Новость создана!')
             return redirect('home')
@@ -1019,210 +1002,44 @@ def admin_export_transfers_view(request):
     
     export_format = request.GET.get('format', 'excel')  # excel или pdf
     
-    month_filter = request.GET.get('month')
-    if month_filter:
-        year, month = map(int, month_filter.split('-'))
-    else:
-        now = timezone.now()
-        year = now.year
-        month = now.month
-    
-    month_names_ru = {
-        1: 'Январь', 2: 'Февраль', 3: 'Март', 4: 'Апрель',
-        5: 'Май', 6: 'Июнь', 7: 'Июль', 8: 'Август',
-        9: 'Сентябрь', 10: 'Октябрь', 11: 'Ноябрь', 12: 'Декабрь'
-    }
-    
-    transfers = BonusTransfer.objects.filter(
-        created_at__year=year,
-        created_at__month=month,
-        is_deleted=False
-    ).select_related('to_employee', 'to_employee__department', 'to_employee__position').order_by('to_employee__last_name')
-    if export_format == 'pdf':
-        return _export_transfers_pdf(transfers, year, month, month_names_ru)
-    else:
-        return _export_transfers_excel(transfers, year, month, month_names_ru)
-
-
-def _export_transfers_excel(transfers, year, month, month_names_ru):
-    """Экспорт в Excel"""
-    # Создаем Excel файл
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"Реестр {month_names_ru[month]} {year}"
-    
-    # Шапка
-    ws.merge_cells('A1:D1')
-    ws['A1'] = f'Начисление из горизонтального премирования за "{month_names_ru[month].upper()}" {year}'
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = Alignment(horizontal='center')
-    
-    # Заголовки таблицы
-    headers = ['ФИО', 'Отдел', 'Должность', 'Сумма']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Данные
-    row = 4
-    total_amount = 0
-    for transfer in transfers:
-        employee = transfer.to_employee
-        ws.cell(row=row, column=1, value=employee.get_full_name())
-        ws.cell(row=row, column=2, value=employee.department.name if employee.department else '')
-        ws.cell(row=row, column=3, value=employee.position.name if employee.position else '')
-        ws.cell(row=row, column=4, value=float(transfer.amount))
-        total_amount += float(transfer.amount)
-        row += 1
-    
-    # Итого
-    ws.cell(row=row, column=3, value='').font = Font(bold=True)
-    ws.cell(row=row, column=4, value=total_amount).font = Font(bold=True)
-    
-    # Подпись генерального директора
-    row += 2
-    ws.cell(row=row, column=1, value='Генеральный директор')
-    ws.cell(row=row, column=1).font = Font(bold=True)
-    row += 3
-    ws.cell(row=row, column=1, value='_________________')
-    
-    # Настройка ширины колонок
-    ws.column_dimensions['A'].width = 30
-    ws.column_dimensions['B'].width = 25
-    ws.column_dimensions['C'].width = 25
-    ws.column_dimensions['D'].width = 15
-    
-    # Создаем HTTP ответ
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="реестр_премий_{month_names_ru[month]}_{year}.xlsx"'
-    wb.save(response)
-    
-    return response
-
-
-def _export_transfers_pdf(transfers, year, month, month_names_ru):
-    """Экспорт в PDF с поддержкой кириллицы"""
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="реестр_премий_{month_names_ru[month]}_{year}.pdf"'
-    
-    # Пробуем зарегистрировать шрифт с поддержкой кириллицы
-    # Используем системные шрифты Windows или стандартные Unicode-шрифты
-    font_name = 'Helvetica'  # По умолчанию
-    
-    # Пробуем найти и зарегистрировать шрифт с поддержкой кириллицы
-    try:
-        import platform
-        system = platform.system()
-        
-        if system == 'Windows':
-            # Пробуем использовать стандартные шрифты Windows
-            font_paths = [
-                'C:/Windows/Fonts/arial.ttf',
-                'C:/Windows/Fonts/arialbd.ttf',
-                'C:/Windows/Fonts/times.ttf',
-            ]
-        elif system == 'Linux':
-            font_paths = [
-                '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-                '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
-            ]
-        else:
-            font_paths = []
-        
-        for font_path in font_paths:
-            if os.path.exists(font_path):
-                try:
-                    pdfmetrics.registerFont(TTFont('CyrillicFont', font_path, 'UTF-8'))
-                    font_name = 'CyrillicFont'
-                    break
-                except:
-                    continue
-    except Exception as e:
-        # Если не удалось зарегистрировать шрифт, используем стандартный
-        pass
-    
-    doc = SimpleDocTemplate(response, pagesize=A4, rightMargin=20*mm, leftMargin=20*mm, topMargin=20*mm, bottomMargin=20*mm)
-    story = []
-    
-    styles = getSampleStyleSheet()
-    
-    # Создаем стили с правильным шрифтом
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Normal'],
-        fontSize=14,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=30,
-        alignment=1,  # Center
-        fontName=font_name,
-        encoding='utf-8',
+    period = resolve_period('month', request.GET.get('month'))
+    year, month = period.start.year, period.start.month
+    
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'excel'
+    
+    # Реестр собирается фоновой командой run_export_worker.
+    # Готовый файл для текущей версии данных месяца отдается сразу.
+    month_start = period.first_month
+    data_version = RegistryMonthVersion.current(month_start)
+    job, created = ExportJob.objects.get_or_create(
+        month=month_start,
+        format=export_format,
+        data_version=data_version,
+        defaults={'requested_by': request.user}
     )
     
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontName=font_name,
-        fontSize=12,
-        encoding='utf-8',
-    )
+    if job.status == 'done' and job.file and job.file.storage.exists(job.file.name):
+        extension, content_type = EXPORT_FORMATS[export_format]
+        return FileResponse(
+            job.file.open('rb'),
+            as_attachment=True,
+            filename=registry_filename(year, month, export_format),
+            content_type=content_type,
+        )
     
-    # Заголовок
-    title_text = f'Начисление из горизонтального премирования за "{month_names_ru[month].upper()}" {year}'
-    story.append(Paragraph(title_text, title_style))
-    story.append(Spacer(1, 12))
+    if job.status == 'done' or (job.status == 'failed' and 'retry' in request.GET):
+        # Файл пропал из хранилища или администратор повторяет неудачную выгрузку
+        job.status = 'pending'
+        job.error = ''
+        job.save(update_fields=['status', 'error'])
     
-    # Подготовка данных для таблицы
-    data = [['ФИО', 'Отдел', 'Должность', 'Сумма']]
-    total_amount = 0
+    context = {
+        'job': job,
+        'period_label': period.label,
+    }
     
-    for transfer in transfers:
-        employee = transfer.to_employee
-        full_name = employee.get_full_name()
-        dept_name = employee.department.name if employee.department else ''
-        pos_name = employee.position.name if employee.position else ''
-        
-        data.append([
-            full_name,
-            dept_name,
-            pos_name,
-            f'{float(transfer.amount):.2f}'
-        ])
-        total_amount += float(transfer.amount)
-    
-    # Итого
-    data.append(['', '', '', f'{total_amount:.2f}'])
-    
-    # Создание таблицы
-    table = Table(data, colWidths=[60*mm, 60*mm, 60*mm, 25*mm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ffffff')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#000000')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), font_name),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTNAME', (0, -1), (-1, -1), font_name),
-        ('FONTSIZE', (0, -1), (-1, -1), 12),
-        ('FONTNAME', (0, 1), (-1, -2), font_name),
-        ('FONTSIZE', (0, 1), (-1, -2), 10),
-    ]))
-    
-    story.append(table)
-    story.append(Spacer(1, 20))
-
-    # Подпись
-    story.append(Paragraph('Генеральный директор', normal_style))
-    story.append(Spacer(1, 30))
-    story.append(Paragraph('_________________/_____________________', normal_style))
-    
-    doc.build(story)
-    return response
+    return render(request, 'employees/admin_export_status.html', context)
 
 
 @login_required